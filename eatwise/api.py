@@ -0,0 +1,300 @@
+"""HTTP API каталога рецептов (JSON) для мобильного клиента и ботов.
+
+Асинхронный сервер на asyncio из стандартной библиотеки, без Streamlit:
+использует тот же слой запросов (пул соединений, индекс фильтров, гидратация,
+поиск). Готовые JSON-ответы (и их gzip-версии) кэшируются по
+(запрос, data_version), поэтому популярные рецепты отдаются без обращения к БД;
+промахи идут в SQLite в пуле потоков и не блокируют цикл событий.
+
+    GET /recipe/{id}
+    GET /random?meal_type=dinner&max_time=30&pan=1&oven=0&blender=0
+    GET /search?q=курица&page=1
+
+ETag и Last-Modified зависят от data_version: после обновления каталога
+клиенты получают новые ответы, до него — 304. Ответы /random не кэшируются.
+
+    python3 eatwise/api.py [--host 127.0.0.1] [--port 8080] [--db eatwise/recipes.db]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from catalog_index import LiveIndex
+from db import DB_PATH, ConnectionPool
+from init_db import init_db
+from planner import SLOTS
+from queries import hydrate_recipes
+from render_cache import RenderCache
+from search import RESULTS_PER_PAGE, search_recipes
+
+HOST = "127.0.0.1"
+PORT = 8080
+GZIP_MIN_SIZE = 512  # меньшие ответы не сжимаются
+GZIP_LEVEL = 6
+MAX_HEADER_SIZE = 16 * 1024
+UNLIMITED_TIME = 2**31 - 1
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+TOOL_FLAGS = ("needs_pan", "needs_oven", "needs_blender")
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off")
+
+
+def _encode(payload) -> tuple[bytes, bytes | None]:
+    """JSON-тело ответа и его gzip-версия (None — если тело слишком маленькое)."""
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    gzipped = gzip.compress(raw, GZIP_LEVEL, mtime=0) if len(raw) >= GZIP_MIN_SIZE else None
+    return raw, gzipped
+
+
+def _recipe_payload(recipe: dict) -> dict:
+    payload = dict(recipe)
+    for col in TOOL_FLAGS:
+        payload[col] = bool(payload[col])
+    return payload
+
+
+def _flag(params: dict, name: str) -> bool:
+    """Флаг инструмента из query string; без параметра инструмент считается доступным."""
+    value = params.get(name, ["1"])[-1].strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"{name}: ожидается 0 или 1")
+
+
+def _int_param(params: dict, name: str, default: int) -> int:
+    value = params.get(name, [None])[-1]
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name}: ожидается целое число") from None
+
+
+class CatalogAPI:
+    """Обработчики запросов API: разбор пути и параметров, кэш ответов, условные запросы."""
+
+    def __init__(self, pool: ConnectionPool, index: LiveIndex | None = None, cache: RenderCache | None = None):
+        self.pool = pool
+        self.index = index or LiveIndex(pool)
+        self.cache = cache or RenderCache()
+        self._modified: dict[int, str] = {}  # data_version -> Last-Modified
+
+    def last_modified(self, data_version: int) -> str:
+        """Время, когда сервис впервые увидел эту версию данных (формат HTTP-даты)."""
+        value = self._modified.get(data_version)
+        if value is None:
+            value = self._modified[data_version] = formatdate(usegmt=True)
+        return value
+
+    def _load_recipe(self, recipe_id: int):
+        with self.pool.connection() as conn:
+            recipes = hydrate_recipes(conn, [recipe_id])
+        return _encode(_recipe_payload(recipes[0])) if recipes else None
+
+    def _load_search(self, text: str, page: int):
+        with self.pool.connection() as conn:
+            results, total = search_recipes(conn, text, page)
+        return _encode(
+            {"query": text, "page": page, "per_page": RESULTS_PER_PAGE, "total": total, "results": results}
+        )
+
+    async def _cached(self, key: tuple, data_version: int, loader, *args):
+        """Тело ответа из кэша или из loader (в пуле потоков); None — не найдено."""
+        cache_key = (key, data_version)
+        body = self.cache.get(cache_key)
+        if body is None:
+            body = await asyncio.get_running_loop().run_in_executor(None, loader, *args)
+            if body is not None:
+                self.cache.put(cache_key, body)
+        return body
+
+    async def respond(self, method: str, target: str, headers: dict) -> tuple[int, list, tuple | None]:
+        """Ответ на запрос: (статус, заголовки, тело) — тело как у _encode или None."""
+        if method not in ("GET", "HEAD"):
+            return 405, [("Allow", "GET, HEAD")], _encode({"error": "Метод не поддерживается"})
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        index = self.index.loaded()
+        if index is None:  # первая загрузка индекса: ждём её в пуле потоков, не блокируя цикл
+            index = await asyncio.get_running_loop().run_in_executor(None, self.index.current)
+        version = index.data_version
+        try:
+            if len(parts) == 2 and parts[0] == "recipe":
+                try:
+                    recipe_id = int(parts[1])
+                except ValueError:
+                    return 404, [], _encode({"error": "Рецепт не найден"})
+                # Сначала рецепт (обычно из кэша), потом 304: на несуществующий id — 404.
+                # Индекс фильтров не годится: в нём нет рецептов без meal_type или cook_time
+                body = await self._cached(("recipe", recipe_id), version, self._load_recipe, recipe_id)
+                if body is None:
+                    return 404, [], _encode({"error": "Рецепт не найден"})
+                conditional = self._not_modified(headers, version)
+                if conditional is not None:
+                    return conditional
+                return 200, self._validators(version), body
+            if parts == ["random"]:
+                meal_type = params.get("meal_type", [""])[-1]
+                if meal_type not in SLOTS:
+                    raise ValueError(f"meal_type: одно из {', '.join(SLOTS)}")
+                recipe = index.pick(
+                    meal_type,
+                    _int_param(params, "max_time", UNLIMITED_TIME),
+                    _flag(params, "pan"),
+                    _flag(params, "oven"),
+                    _flag(params, "blender"),
+                )
+                if recipe is None:
+                    return 404, [("Cache-Control", "no-store")], _encode({"error": "Нет подходящего рецепта"})
+                body = await self._cached(("recipe", recipe["id"]), version, self._load_recipe, recipe["id"])
+                if body is None:
+                    return 404, [("Cache-Control", "no-store")], _encode({"error": "Нет подходящего рецепта"})
+                return 200, [("Cache-Control", "no-store")], body
+            if parts == ["search"]:
+                text = params.get("q", [""])[-1].strip()
+                page = max(_int_param(params, "page", 1), 1)
+                conditional = self._not_modified(headers, version)
+                if conditional is not None:
+                    return conditional
+                body = await self._cached(("search", text, page), version, self._load_search, text, page)
+                return 200, self._validators(version), body
+        except ValueError as e:
+            return 400, [], _encode({"error": str(e)})
+        return 404, [], _encode({"error": "Неизвестный путь"})
+
+    def _validators(self, data_version: int) -> list:
+        return [
+            ("ETag", f'W/"{data_version}"'),
+            ("Last-Modified", self.last_modified(data_version)),
+            ("Cache-Control", "no-cache"),
+        ]
+
+    def _not_modified(self, headers: dict, data_version: int):
+        """Ответ 304, если у клиента актуальная версия (If-None-Match / If-Modified-Since)."""
+        etag = f'W/"{data_version}"'
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            if "*" in tags or etag in tags or etag[2:] in tags:
+                return 304, self._validators(data_version), None
+            return None
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                if since >= parsedate_to_datetime(self.last_modified(data_version)):
+                    return 304, self._validators(data_version), None
+            except (TypeError, ValueError):
+                pass
+        return None
+
+
+def _http_response(status: int, headers: list, body, accept_gzip: bool, head_only: bool, keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    payload = b""
+    if body is not None:
+        raw, gzipped = body
+        payload = raw
+        if gzipped is not None:
+            lines.append("Vary: Accept-Encoding")
+            if accept_gzip:
+                payload = gzipped
+                lines.append("Content-Encoding: gzip")
+        lines.append("Content-Type: application/json; charset=utf-8")
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    lines.append(f"Content-Length: {len(payload)}")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head if head_only or status == 304 else head + payload
+
+
+async def _handle_connection(api: CatalogAPI, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Обслуживает одно соединение (HTTP/1.1 keep-alive, запросы по очереди)."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            request_line, *header_lines = head[:-4].decode("latin-1").split("\r\n")
+            headers = {}
+            for line in header_lines:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            try:
+                method, target, version = request_line.split(" ")
+            except ValueError:
+                writer.write(_http_response(400, [], _encode({"error": "Некорректный запрос"}), False, False, False))
+                break
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:  # без корректной длины тела не найти начало следующего запроса
+                body = _encode({"error": "Некорректный Content-Length"})
+                writer.write(_http_response(400, [], body, False, False, False))
+                break
+            if length:
+                await reader.readexactly(length)
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            try:
+                status, extra, body = await api.respond(method, target, headers)
+            except Exception:
+                status, extra, body = 500, [], _encode({"error": "Внутренняя ошибка"})
+                keep_alive = False
+            accept_gzip = "gzip" in headers.get("accept-encoding", "")
+            writer.write(_http_response(status, extra, body, accept_gzip, method == "HEAD", keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(db_path: Path = DB_PATH, host: str = HOST, port: int = PORT):
+    """Запускает API и обслуживает запросы до остановки процесса."""
+    init_db(db_path)
+    api = CatalogAPI(ConnectionPool(db_path))
+    await asyncio.get_running_loop().run_in_executor(None, api.index.current)  # индекс — до первого запроса
+    server = await asyncio.start_server(
+        lambda r, w: _handle_connection(api, r, w), host, port, limit=MAX_HEADER_SIZE
+    )
+    print(f"EatWise API: http://{host}:{port}/")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API каталога рецептов (JSON).")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="путь к БД (по умолчанию %(default)s)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.db, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,224 +2,522 @@
 EatWise v0 — минимальный веб-прототип на Streamlit.
 Пользователь выбирает ограничения и получает один рецепт.
 """
-import sqlite3
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import streamlit as st
 
+from catalog_index import FilterIndex, LiveIndex
+from db import DB_PATH, RECIPE_COLUMNS, ConnectionPool, read_data_version
+from deck import RecipeDeck
+from export_static import EXPORT_DIR, recipe_page_name
+from formatting import MEAL_LABELS, _copy_button_html, format_ingredient, format_used_tools
 from init_db import init_db
+from metrics import METRICS, SLOW_QUERY_MS, timed
+from pantry import IGNORED_UNITS, PantryIndex, covers, ingredient_key, parse_pantry
+from planner import DAYS, SLOTS, plan_week, reroll_slot
+from queries import hydrate_recipes
+from render_cache import RenderCache
+from sampling import pick_random_recipe
+from search import RESULTS_PER_PAGE, search_recipes
+from shopping import build_shopping_list
+from snapshot import LiveSnapshot
+
+logger = logging.getLogger("eatwise.app")
+
+PREFETCH_WORKERS = 4
+# Адрес статических страниц рецептов (export_static.py); если задан, у рецепта по ссылке ?recipe_id=
+# появляется кнопка на его выгруженную страницу. Перенаправление без сессии Streamlit — на прокси (README)
+STATIC_RECIPES_URL = os.environ.get("EATWISE_STATIC_URL")
+# Каталог, куда выгружены страницы: по нему проверяется, что страница рецепта уже есть
+STATIC_RECIPES_DIR = Path(os.environ.get("EATWISE_STATIC_DIR", EXPORT_DIR))
+# Файл снимка каталога (snapshot.py); если задан, генератор и карточки рецептов читаются из него
+CATALOG_SNAPSHOT = os.environ.get("EATWISE_SNAPSHOT")
+
+
+@st.cache_resource
+def get_pool() -> ConnectionPool:
+    """Пул соединений, общий для всех сессий процесса."""
+    return ConnectionPool(DB_PATH)
+
+
+@st.cache_resource
+def get_filter_index() -> LiveIndex | LiveSnapshot:
+    """Индекс фильтров генератора, общий для всех сессий процесса.
+
+    С EATWISE_SNAPSHOT — снимок каталога в mmap, общий для всех процессов хоста.
+    """
+    if CATALOG_SNAPSHOT:
+        return LiveSnapshot(CATALOG_SNAPSHOT)
+    return LiveIndex(get_pool(), FilterIndex.load)
+
+
+@st.cache_resource
+def get_pantry_index() -> LiveIndex:
+    """Инвертированный индекс ингредиентов для подбора по продуктам (без EATWISE_SNAPSHOT).
+
+    Со снимком индекс берётся из него же (CatalogSnapshot.pantry).
+    """
+    return LiveIndex(get_pool(), PantryIndex.load)
 
-DB_PATH = Path(__file__).parent / "recipes.db"
 
-MEAL_LABELS = {"breakfast": "Завтрак", "lunch": "Обед", "dinner": "Ужин"}
-TOOL_COLUMNS = [
-    ("needs_pan", "Сковорода"),
-    ("needs_oven", "Духовка"),
-    ("needs_blender", "Блендер"),
-]
+@st.cache_resource
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """Потоки фоновой подгрузки следующего рецепта колоды, общие для всех сессий."""
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="eatwise-prefetch")
 
 
+@st.cache_resource
+def get_render_cache() -> RenderCache:
+    """Кэш отрисованных рецептов, общий для всех сессий процесса."""
+    return RenderCache()
+
+
+@timed("query")
 def get_recipe_by_id(recipe_id: int) -> dict | None:
     """Возвращает рецепт по id или None."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM recipes WHERE id = ?", (recipe_id,))
-    row = cur.fetchone()
-    conn.close()
+    with get_pool().connection() as conn:
+        row = conn.execute(f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE id = ?", (recipe_id,)).fetchone()
     return dict(row) if row else None
 
 
+@timed("query")
 def get_recipe(meal_type: str, max_time: int, has_pan: bool, has_oven: bool, has_blender: bool):
-    """Возвращает один случайный рецепт по фильтрам или None."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
-    # Базовые условия
-    conditions = ["meal_type = ?", "cook_time <= ?"]
-    params = [meal_type, max_time]
-
-    # Инструменты: рецепт подходит только если все нужные инструменты есть у пользователя
-    if not has_pan:
-        conditions.append("needs_pan = 0")
-    if not has_oven:
-        conditions.append("needs_oven = 0")
-    if not has_blender:
-        conditions.append("needs_blender = 0")
-
-    query = f"""
-        SELECT * FROM recipes
-        WHERE {' AND '.join(conditions)}
-        ORDER BY RANDOM()
-        LIMIT 1
+    """Возвращает один случайный рецепт по фильтрам или None.
+
+    Выбор идёт по индексу в памяти (catalog_index.py), а пока он загружается
+    при старте процесса — по индексам SQLite (sampling.py).
     """
-    cur.execute(query, params)
-    row = cur.fetchone()
-    conn.close()
+    index = get_filter_index().loaded()
+    if index is not None:
+        return index.pick(meal_type, max_time, has_pan, has_oven, has_blender)
+    with get_pool().connection() as conn:
+        row = pick_random_recipe(conn, meal_type, max_time, has_pan, has_oven, has_blender)
     return dict(row) if row else None
 
 
-def format_used_tools(recipe: dict) -> list[str]:
-    """Список использованных инструментов по-русски."""
-    used = []
-    for col, label in TOOL_COLUMNS:
-        if recipe.get(col):
-            used.append(label)
-    return used
+def _load_recipes(pool: ConnectionPool, ids: list[int]) -> list[dict]:
+    # Принимает пул явно: вызывается и из потоков подгрузки, где нет контекста Streamlit
+    with pool.connection() as conn:
+        return hydrate_recipes(conn, ids)
 
 
-def get_ingredients(recipe_id: int) -> list[dict]:
-    """Возвращает список ингредиентов: name, amount (или None), unit_name."""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        """SELECT i.name, i.amount, u.name
-           FROM recipe_ingredients i
-           JOIN units u ON i.unit_id = u.id
-           WHERE i.recipe_id = ?
-           ORDER BY i.sort_order""",
-        (recipe_id,),
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return [{"name": r[0], "amount": r[1], "unit": (r[2] or "").strip()} for r in rows]
+@timed("query")
+def get_recipes(ids: list[int]) -> list[dict]:
+    """Рецепты по списку id вместе с ингредиентами и шагами (см. queries.hydrate_recipes)."""
+    if CATALOG_SNAPSHOT:
+        return get_filter_index().current().hydrate(ids)
+    return _load_recipes(get_pool(), ids)
+
+
+def get_full_recipe(recipe_id: int) -> dict | None:
+    """Рецепт по id с ключами "ingredients" и "steps" или None."""
+    recipes = get_recipes([recipe_id])
+    return recipes[0] if recipes else None
+
 
+@timed("query")
+def match_pantry(
+    pantry_keys: list[str], meal_type: str, max_time: int, has_pan: bool, has_oven: bool, has_blender: bool
+) -> list[dict]:
+    """Рецепты по убыванию покрытия продуктами пользователя с учётом фильтров генератора."""
+    index = get_filter_index().current()
+    allowed = index.matching_ids(meal_type, max_time, has_pan, has_oven, has_blender)
+    pantry = index.pantry if CATALOG_SNAPSHOT else get_pantry_index().current()
+    return pantry.match(pantry_keys, allowed)
 
-def _format_amount(amount: float) -> str:
-    """Количество: целое или один знак после запятой (русский формат)."""
-    if amount is None:
-        return ""
-    if amount == int(amount):
-        return str(int(amount))
-    return str(round(amount, 1)).replace(".", ",")
 
+@timed("query")
+def get_shopping_list(servings: dict[int, float]) -> list[dict]:
+    """Сводный список покупок по {id рецепта: порции} (см. shopping.py)."""
+    with get_pool().connection() as conn:
+        return build_shopping_list(conn, servings)
 
-def format_ingredient(ing: dict, num: int) -> str:
-    """Форматирует один ингредиент: '1) Название — количество единица' или '1) Название — по вкусу'."""
-    name = ing["name"]
-    amount = ing.get("amount")
-    unit = (ing.get("unit") or "").strip()
-    if amount is not None and unit and unit not in ("по вкусу", "для жарки"):
-        return f"{num}) {name} — {_format_amount(amount)} {unit}"
-    if unit in ("по вкусу", "для жарки"):
-        return f"{num}) {name} — {unit}"
-    if amount is not None:
-        return f"{num}) {name} — {_format_amount(amount)}"
-    return f"{num}) {name}"
+
+@timed("query")
+def find_recipes(text: str, page: int = 1) -> tuple[list[dict], int]:
+    """Полнотекстовый поиск: страница результатов и общее число (см. search.py)."""
+    with get_pool().connection() as conn:
+        return search_recipes(conn, text, page)
+
+
+@timed("query")
+def get_ingredients(recipe_id: int) -> list[dict]:
+    """Возвращает список ингредиентов: name, amount (или None), unit_name."""
+    with get_pool().connection() as conn:
+        rows = conn.execute(
+            """SELECT i.name, i.amount, u.name
+               FROM recipe_ingredients i
+               JOIN units u ON i.unit_id = u.id
+               WHERE i.recipe_id = ?
+               ORDER BY i.sort_order""",
+            (recipe_id,),
+        ).fetchall()
+    return [{"name": r[0], "amount": r[1], "unit": (r[2] or "").strip()} for r in rows]
 
 
+@timed("query")
 def get_steps(recipe_id: int) -> list[str]:
     """Возвращает пошаговые инструкции рецепта по порядку."""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT step_text FROM recipe_steps WHERE recipe_id = ? ORDER BY step_order",
-        (recipe_id,),
-    )
-    rows = cur.fetchall()
-    conn.close()
+    with get_pool().connection() as conn:
+        rows = conn.execute(
+            "SELECT step_text FROM recipe_steps WHERE recipe_id = ? ORDER BY step_order",
+            (recipe_id,),
+        ).fetchall()
     return [r[0] for r in rows]
 
 
-def _build_copy_text(recipe_name: str, ingredients: list[dict]) -> str:
-    """Собирает текст для копирования: название и нумерованные ингредиенты (ссылку добавляет JS)."""
-    lines = [recipe_name]
-    for i, ing in enumerate(ingredients, start=1):
-        lines.append(format_ingredient(ing, i))
-    return "\n".join(lines)
-
-
-def _render_copy_button(recipe_name: str, ingredients: list[dict], recipe_id: int):
-    """Кнопка «Скопировать ингредиенты»: копирует в буфер название, ингредиенты и ссылку (JS)."""
-    copy_body = _build_copy_text(recipe_name, ingredients)
-    # Экранируем для вставки в JS-строку (обратный слэш, кавычки, переносы)
-    copy_body_esc = copy_body.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
-    html = f"""
-    <div id="copy-block">
-        <button id="copy-btn" type="button" style="
-            padding: 0.4rem 0.8rem;
-            border-radius: 6px;
-            border: 1px solid #ccc;
-            background: #f0f2f6;
-            cursor: pointer;
-            font-size: 0.9rem;
-        ">Скопировать ингредиенты</button>
-        <span id="copy-toast" style="margin-left: 0.5rem; color: green; font-size: 0.9rem; display: none;">Список ингредиентов и ссылка на рецепт скопированы в буфер обмена!</span>
-    </div>
-    <script>
-        (function() {{
-            var btn = document.getElementById('copy-btn');
-            var toast = document.getElementById('copy-toast');
-            var body = '{copy_body_esc}';
-            var recipeId = {recipe_id};
-            function showToast() {{
-                toast.style.display = 'inline';
-                setTimeout(function() {{ toast.style.display = 'none'; }}, 3000);
-            }}
-            function fallbackCopy(text) {{
-                var ta = document.createElement('textarea');
-                ta.value = text;
-                ta.style.position = 'fixed';
-                ta.style.left = '-9999px';
-                document.body.appendChild(ta);
-                ta.select();
-                try {{
-                    document.execCommand('copy');
-                }} catch (e) {{}}
-                document.body.removeChild(ta);
-            }}
-            btn.onclick = function() {{
-                var loc = window.top && window.top.location ? window.top.location : window.location;
-                var base = loc.origin + (loc.pathname || '/');
-                if (!base.endsWith('/')) base += '/';
-                var link = base + '?recipe_id=' + recipeId;
-                var full = body + '\\nСсылка на рецепт: ' + link;
-                if (navigator.clipboard && typeof navigator.clipboard.writeText === 'function') {{
-                    navigator.clipboard.writeText(full).then(showToast).catch(function() {{ fallbackCopy(full); showToast(); }});
-                }} else {{
-                    fallbackCopy(full);
-                    showToast();
-                }}
-            }};
-        }})();
-    </script>
+def _render_copy_button(recipe_name: str, ingredients: list[dict], recipe_id: int | None = None):
+    st.components.v1.html(_copy_button_html(recipe_name, ingredients, recipe_id), height=50)
+
+
+def _add_to_shopping(recipe_id: int):
+    st.session_state.setdefault("shopping", {}).setdefault(recipe_id, 1.0)
+
+
+def _remove_from_shopping(recipe_id: int):
+    st.session_state.get("shopping", {}).pop(recipe_id, None)
+
+
+@timed("formatting")
+def _build_rendered_recipe(recipe: dict) -> dict:
+    """Готовые строки блока рецепта (recipe — с ingredients и steps, как у get_full_recipe)."""
+    tools = format_used_tools(recipe)
+    ingredients = recipe["ingredients"]
+    return {
+        "id": recipe["id"],
+        "title": f"**{recipe['name']}**",
+        "time": f"⏱ **Время приготовления:** {recipe['cook_time']} мин",
+        "tools": ", ".join(tools) if tools else None,
+        "ingredients": [format_ingredient(ing, i) for i, ing in enumerate(ingredients, start=1)],
+        "copy_html": _copy_button_html(recipe["name"], ingredients, recipe["id"]) if ingredients else None,
+        "steps": [f"**{i}.** {step}" for i, step in enumerate(recipe["steps"], start=1)],
+    }
+
+
+def get_data_version() -> int:
+    """Текущая data_version каталога — одно чтение из meta, без ожидания загрузки индекса."""
+    if CATALOG_SNAPSHOT:
+        return get_filter_index().current().data_version
+    with get_pool().connection() as conn:
+        return read_data_version(conn)
+
+
+def get_rendered_recipe(recipe_id: int, recipe: dict | None = None) -> dict | None:
+    """Отрисованный рецепт из кэша по (recipe_id, data_version) или None, если рецепта нет.
+
+    recipe — уже загруженный рецепт (get_full_recipe), чтобы при промахе не читать БД.
     """
-    st.components.v1.html(html, height=50)
+    key = (recipe_id, get_data_version())
+    cache = get_render_cache()
+    rendered = cache.get(key)
+    if rendered is None:
+        recipe = recipe or get_full_recipe(recipe_id)
+        if recipe is None:
+            return None
+        rendered = cache.put(key, _build_rendered_recipe(recipe))
+    return rendered
 
 
-def _render_recipe(recipe: dict, ingredients: list[dict], steps: list[str], tools: list[str]):
+@timed("render")
+def _render_recipe(rendered: dict):
     """Отрисовка блока рецепта: название, время, инструменты, ингредиенты (с кнопкой копирования), шаги."""
-    recipe_id = recipe["id"]
-    st.success(f"**{recipe['name']}**")
-    st.write(f"⏱ **Время приготовления:** {recipe['cook_time']} мин")
-    if tools:
-        st.write("🛠 **Используемые инструменты:** ", ", ".join(tools))
+    recipe_id = rendered["id"]
+    st.success(rendered["title"])
+    st.write(rendered["time"])
+    if rendered["tools"]:
+        st.write("🛠 **Используемые инструменты:** ", rendered["tools"])
 
     st.divider()
     st.subheader("📋 Ингредиенты")
-    if ingredients:
-        for i, ing in enumerate(ingredients, start=1):
-            st.write(format_ingredient(ing, i))
-        _render_copy_button(recipe["name"], ingredients, recipe_id)
+    if rendered["ingredients"]:
+        for line in rendered["ingredients"]:
+            st.write(line)
+        st.components.v1.html(rendered["copy_html"], height=50)
+        st.button(
+            "🛒 В список покупок", key=f"add_to_shopping_{recipe_id}", on_click=_add_to_shopping, args=(recipe_id,)
+        )
     else:
         st.caption("Ингредиенты не указаны.")
 
     st.divider()
     st.subheader("👨‍🍳 Пошаговые инструкции")
-    if steps:
-        for i, step in enumerate(steps, start=1):
-            st.write(f"**{i}.** {step}")
+    if rendered["steps"]:
+        for line in rendered["steps"]:
+            st.write(line)
     else:
         st.caption("Инструкции не указаны.")
 
 
+def _render_filters() -> dict:
+    """Фильтры генератора; возвращает аргументы для get_recipe."""
+    st.caption("Выберите ограничения — получите рецепт")
+    meal_choice = st.radio(
+        "Тип приёма пищи",
+        options=list(MEAL_LABELS.keys()),
+        format_func=lambda x: MEAL_LABELS[x],
+        horizontal=True,
+    )
+    max_time = st.slider("Максимальное время приготовления (минуты)", 5, 120, 30, 5)
+    st.subheader("Доступные инструменты")
+    has_pan = st.checkbox("Сковорода", value=True)
+    has_oven = st.checkbox("Духовка", value=False)
+    has_blender = st.checkbox("Блендер", value=False)
+    return {
+        "meal_type": meal_choice,
+        "max_time": max_time,
+        "has_pan": has_pan,
+        "has_oven": has_oven,
+        "has_blender": has_blender,
+    }
+
+
+def _draw_from_deck(filters: dict) -> dict | None:
+    """Следующий рецепт из колоды сессии (без повторов) с ингредиентами и шагами.
+
+    Колода перестраивается при смене фильтров или данных и когда кончается.
+    Рецепт берётся из фоновой подгрузки, если она была, иначе читается из БД.
+    Пока индекс загружается при старте процесса, рецепт выбирается без колоды.
+    """
+    index = get_filter_index().loaded()
+    if index is None:
+        recipe = get_recipe(**filters)
+        return get_full_recipe(recipe["id"]) if recipe else None
+    deck = st.session_state.get("deck")
+    if deck is None or not deck.fits(index, filters) or not len(deck):
+        deck = RecipeDeck.build(index, filters, avoid=st.session_state.get("deck_last"))
+        st.session_state["deck"] = deck
+    recipe_id = deck.draw()
+    if recipe_id is None:
+        return None
+    st.session_state["deck_last"] = recipe_id
+    recipes = None
+    prefetched = st.session_state.pop("deck_prefetch", None)
+    # Подгрузка годится только для того же рецепта и тех же данных, что и сейчас
+    if prefetched is not None and prefetched[:2] == (recipe_id, index.data_version):
+        try:
+            recipes = prefetched[2].result()
+        except Exception:
+            # Фоновая подгрузка не удалась (нет соединения в пуле, ошибка SQLite) — читаем заново
+            logger.warning("фоновая подгрузка рецепта %s не удалась", recipe_id, exc_info=True)
+    if recipes is None:
+        recipes = get_recipes([recipe_id])
+    # Пока пользователь читает рецепт, подгружаем следующий (из снимка он читается и так без SQL)
+    next_id = deck.peek()
+    if next_id is not None and not CATALOG_SNAPSHOT:
+        future = get_prefetch_executor().submit(_load_recipes, get_pool(), [next_id])
+        st.session_state["deck_prefetch"] = (next_id, index.data_version, future)
+    return recipes[0] if recipes else None
+
+
+def _render_generator(filters: dict):
+    """Генератор: кнопка «Что приготовить?» и подбор по продуктам."""
+    if st.button("Что приготовить?"):
+        recipe = _draw_from_deck(filters)
+        if recipe is None:
+            st.warning("Нет подходящего рецепта.")
+        else:
+            _render_recipe(get_rendered_recipe(recipe["id"], recipe))
+
+    st.divider()
+    st.subheader("🧺 Из того, что есть")
+    pantry_text = st.text_area("Продукты через запятую", placeholder="Например: яйца, лук, картофель")
+    if st.button("Подобрать по продуктам"):
+        pantry_keys = parse_pantry(pantry_text)
+        if not pantry_keys:
+            st.warning("Укажите хотя бы один продукт.")
+            return
+        matches = match_pantry(pantry_keys, **filters)
+        if not matches:
+            st.warning("Нет подходящего рецепта.")
+            return
+        recipes = {r["id"]: r for r in get_recipes([m["id"] for m in matches])}
+        for m in matches:
+            recipe = recipes.get(m["id"])
+            if recipe is None:
+                continue
+            st.markdown(f"{_recipe_link(recipe)} — есть {m['matched']} из {m['required']} ({m['coverage']:.0%})")
+            missing = [
+                ing["name"]
+                for ing in recipe["ingredients"]
+                if ing["unit"] not in IGNORED_UNITS and not covers(pantry_keys, ingredient_key(ing["name"]))
+            ]
+            if missing:
+                st.caption("Не хватает: " + ", ".join(missing))
+
+
+def _recipe_link(recipe: dict) -> str:
+    """Markdown-ссылка на страницу рецепта ?recipe_id=."""
+    name = recipe["name"].replace("[", "\\[").replace("]", "\\]")
+    return f"[{name}](/?recipe_id={recipe['id']})"
+
+
+def _render_search():
+    """Поиск по названию, ингредиентам и шагам с постраничным выводом."""
+    query = st.text_input("Название, ингредиент или шаг", placeholder="Например: борщ, курица")
+    if not query.strip():
+        return
+    # Новый запрос — с первой страницы
+    if st.session_state.get("search_query") != query:
+        st.session_state["search_query"] = query
+        st.session_state["search_page"] = 1
+    page = st.session_state.get("search_page", 1)
+    results, total = find_recipes(query, page)
+    if total == 0:
+        st.info("Ничего не найдено.")
+        return
+    st.caption(f"Найдено рецептов: {total}")
+    for r in results:
+        meal = MEAL_LABELS.get(r["meal_type"], r["meal_type"])
+        st.markdown(f"{_recipe_link(r)} — {meal}, {r['cook_time']} мин")
+    pages = -(-total // RESULTS_PER_PAGE)
+    if pages > 1:
+        st.number_input("Страница", min_value=1, max_value=pages, step=1, key="search_page")
+
+
+def _plan_options(filters: dict) -> dict:
+    """Аргументы planner.plan_week / reroll_slot из фильтров генератора и настроек плана."""
+    return {
+        "max_time": filters["max_time"],
+        "has_pan": filters["has_pan"],
+        "has_oven": filters["has_oven"],
+        "has_blender": filters["has_blender"],
+        "time_budget": st.session_state.get("plan_time_budget") or None,
+        "max_oven": st.session_state.get("plan_max_oven"),
+        "max_blender": st.session_state.get("plan_max_blender"),
+    }
+
+
+def _reroll_plan_slot(slot: int, options: dict):
+    plan = st.session_state["plan"]
+    plan[slot] = reroll_slot(get_filter_index().current(), plan, slot, **options)
+
+
+def _add_plan_to_shopping():
+    for rid in st.session_state.get("plan", []):
+        if rid is not None:
+            _add_to_shopping(rid)
+
+
+def _render_planner(filters: dict):
+    """План на неделю: завтрак, обед и ужин на 7 дней с учётом фильтров генератора."""
+    st.caption("Время и инструменты берутся из вкладки «Генератор».")
+    slots_total = DAYS * len(SLOTS)
+    col_budget, col_oven, col_blender = st.columns(3)
+    col_budget.number_input(
+        "Бюджет времени, мин (0 — без лимита)", min_value=0, value=0, step=30, key="plan_time_budget"
+    )
+    col_oven.number_input("Духовка, раз", min_value=0, max_value=slots_total, value=slots_total, key="plan_max_oven")
+    col_blender.number_input(
+        "Блендер, раз", min_value=0, max_value=slots_total, value=slots_total, key="plan_max_blender"
+    )
+    options = _plan_options(filters)
+    if st.button("Составить план"):
+        st.session_state["plan"] = plan_week(get_filter_index().current(), **options)
+
+    plan = st.session_state.get("plan")
+    if not plan:
+        return
+    index = get_filter_index().current()
+    total_time = 0
+    for day in range(DAYS):
+        st.markdown(f"**День {day + 1}**")
+        for i, meal in enumerate(SLOTS):
+            slot = day * len(SLOTS) + i
+            recipe = index.recipe(plan[slot]) if plan[slot] is not None else None
+            col_recipe, col_reroll = st.columns([8, 1])
+            if recipe is None:
+                col_recipe.write(f"{MEAL_LABELS[meal]}: нет подходящего рецепта")
+            else:
+                total_time += recipe["cook_time"]
+                col_recipe.markdown(f"{MEAL_LABELS[meal]}: {_recipe_link(recipe)} — {recipe['cook_time']} мин")
+            col_reroll.button("🎲", key=f"reroll_{slot}", on_click=_reroll_plan_slot, args=(slot, options))
+    st.caption(f"Всего времени у плиты: {total_time} мин")
+    st.button("🛒 Добавить план в список покупок", on_click=_add_plan_to_shopping)
+
+
+def _render_shopping():
+    """Отложенные рецепты с числом порций и сводный список покупок по ним."""
+    basket = st.session_state.get("shopping", {})
+    if not basket:
+        st.caption("Добавьте рецепты кнопкой «🛒 В список покупок».")
+        return
+    recipes = {r["id"]: r for r in get_recipes(list(basket))}
+    servings = {}
+    for rid in list(basket):
+        recipe = recipes.get(rid)
+        if recipe is None:
+            basket.pop(rid)
+            continue
+        col_name, col_servings, col_remove = st.columns([6, 2, 1])
+        col_name.markdown(_recipe_link(recipe))
+        servings[rid] = col_servings.number_input(
+            "Порции",
+            min_value=0.5,
+            step=0.5,
+            value=float(basket[rid]),
+            key=f"servings_{rid}",
+            label_visibility="collapsed",
+        )
+        basket[rid] = servings[rid]
+        col_remove.button("✕", key=f"remove_from_shopping_{rid}", on_click=_remove_from_shopping, args=(rid,))
+    if not servings:
+        st.caption("Добавьте рецепты кнопкой «🛒 В список покупок».")
+        return
+
+    st.subheader("🛒 Список покупок")
+    items = get_shopping_list(servings)
+    for i, ing in enumerate(items, start=1):
+        st.write(format_ingredient(ing, i))
+    _render_copy_button("Список покупок", items)
+
+
+def _static_page_url(recipe_id: int) -> str | None:
+    """Адрес статической страницы рецепта или None, если страница ещё не выгружена.
+
+    Рецепт, добавленный синхронизацией после последнего экспорта, есть в каталоге,
+    но не на диске — поэтому проверяется файл страницы, а не индекс.
+    """
+    if not STATIC_RECIPES_URL or not (STATIC_RECIPES_DIR / recipe_page_name(recipe_id)).is_file():
+        return None
+    return f"{STATIC_RECIPES_URL.rstrip('/')}/{recipe_page_name(recipe_id)}"
+
+
+def _render_debug_metrics():
+    """Скрытая страница ?debug=metrics: метрики процесса в формате Prometheus и медленные запросы."""
+    for key, value in get_render_cache().stats().items():
+        suffix = "_total" if key in ("hits", "misses", "evictions") else ""
+        METRICS.set(f"eatwise_render_cache_{key}{suffix}", value)
+    text = METRICS.render_prometheus()
+    st.subheader("Метрики")
+    st.download_button("Скачать metrics.txt", text, file_name="metrics.txt", mime="text/plain")
+    st.code(text, language="text")
+    st.subheader(f"Медленные запросы (от {SLOW_QUERY_MS:g} мс)")
+    if not METRICS.slow_queries:
+        st.caption("Медленных запросов не было.")
+    for entry in reversed(METRICS.slow_queries):
+        st.write(f"**{entry['ms']} мс**, строк {entry['rows']}")
+        st.code("\n".join([entry["query"], *entry["plan"]]), language="sql")
+
+
+@timed("rerun")
 def main():
-    init_db()
+    init_db(DB_PATH)
+    # Индексы начинают загружаться в фоне с первого запуска скрипта; дальше по скрипту
+    # их ждут только действия, которым без них не обойтись (план недели, подбор по продуктам)
+    get_filter_index().loaded()
+    if not CATALOG_SNAPSHOT:
+        get_pantry_index().loaded()
 
     st.set_page_config(page_title="EatWise", page_icon="🍳")
     st.title("🍳 EatWise")
 
+    if hasattr(st, "query_params") and st.query_params.get("debug") == "metrics":
+        _render_debug_metrics()
+        return
+
     # Открытие по ссылке ?recipe_id=<id> — показываем только рецепт
     recipe_id_param = None
     if hasattr(st, "query_params") and st.query_params:
@@ -231,41 +529,30 @@ def main():
     if recipe_id_param is not None:
         try:
             rid = int(recipe_id_param)
-            recipe = get_recipe_by_id(rid)
-            if recipe:
+            rendered = get_rendered_recipe(rid)
+            if rendered:
                 st.link_button("← Генератор рецептов", url="/", type="secondary")
-                ingredients = get_ingredients(rid)
-                steps = get_steps(rid)
-                tools = format_used_tools(recipe)
-                _render_recipe(recipe, ingredients, steps, tools)
+                static_url = _static_page_url(rid)
+                if static_url:
+                    st.link_button("Статическая страница рецепта", url=static_url)
+                _render_recipe(rendered)
                 return
         except ValueError:
             pass
         st.warning("Рецепт не найден. Укажите корректный recipe_id в ссылке или выберите рецепт ниже.")
 
-    st.caption("Выберите ограничения — получите рецепт")
-    meal_choice = st.radio(
-        "Тип приёма пищи",
-        options=list(MEAL_LABELS.keys()),
-        format_func=lambda x: MEAL_LABELS[x],
-        horizontal=True,
+    tab_generator, tab_planner, tab_search, tab_shopping = st.tabs(
+        ["Генератор", "План на неделю", "Поиск", "Список покупок"]
     )
-    max_time = st.slider("Максимальное время приготовления (минуты)", 5, 120, 30, 5)
-    st.subheader("Доступные инструменты")
-    has_pan = st.checkbox("Сковорода", value=True)
-    has_oven = st.checkbox("Духовка", value=False)
-    has_blender = st.checkbox("Блендер", value=False)
-
-    if st.button("Что приготовить?"):
-        recipe = get_recipe(meal_choice, max_time, has_pan, has_oven, has_blender)
-        if recipe is None:
-            st.warning("Нет подходящего рецепта.")
-        else:
-            recipe_id = recipe["id"]
-            ingredients = get_ingredients(recipe_id)
-            steps = get_steps(recipe_id)
-            tools = format_used_tools(recipe)
-            _render_recipe(recipe, ingredients, steps, tools)
+    with tab_generator:
+        filters = _render_filters()
+        _render_generator(filters)
+    with tab_planner:
+        _render_planner(filters)
+    with tab_search:
+        _render_search()
+    with tab_shopping:
+        _render_shopping()
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Бенчмарки EatWise. Запуск из папки eatwise: python3 -m benchmarks.<модуль>."""
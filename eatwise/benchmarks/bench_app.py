@@ -0,0 +1,193 @@
+"""Набор бенчмарков приложения на синтетических каталогах (benchmarks/catalog.py).
+
+Для каждого размера каталога измеряет:
+  - init_db на пустой БД (холодный старт, отдельно _populate_from_json) и
+    повторный init_db (тёплый старт, схема актуальна);
+  - загрузку индекса фильтров и app.get_recipe по всем сочетаниям фильтров;
+  - app.get_ingredients, app.get_steps и app.get_full_recipe по случайным id;
+  - форматирование: format_ingredient, _build_copy_text, _copy_button_html.
+Результаты пишутся в JSON (--output) вместе с коммитом и версиями, чтобы
+сравнивать их между коммитами.
+
+    cd eatwise
+    python3 -m benchmarks.bench_app --sizes 1000 100000 --output bench_results.json
+    python3 -m benchmarks.bench_app --sizes 1000000 --draws 2000
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import init_db as init_db_module
+from benchmarks.catalog import quiet_streamlit_loggers, write_catalog
+from formatting import _build_copy_text, _copy_button_html, format_ingredient
+from sampling import allowed_masks
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner"]
+TIME_STEPS = range(5, 121, 5)  # шаги слайдера времени в app.py
+WARM_INIT_CALLS = 50
+
+
+def _timed(fn, args_list: list[tuple]) -> dict:
+    """Задержки вызовов fn(*args) по списку аргументов: среднее и перцентили, мкс."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6, 2),
+    }
+
+
+def _cold_init(db_path: Path, json_path: Path) -> dict:
+    """init_db на пустой БД с каталогом json_path; время _populate_from_json — отдельно."""
+    populate = init_db_module._populate_from_json
+    json_default = init_db_module.RECIPES_JSON_PATH
+    populate_seconds = []
+
+    def timed_populate(cur):
+        start = time.perf_counter()
+        populate(cur)
+        populate_seconds.append(time.perf_counter() - start)
+
+    init_db_module.RECIPES_JSON_PATH = json_path
+    init_db_module._populate_from_json = timed_populate
+    try:
+        start = time.perf_counter()
+        init_db_module.init_db(db_path)
+        total = time.perf_counter() - start
+    finally:
+        init_db_module.RECIPES_JSON_PATH = json_default
+        init_db_module._populate_from_json = populate
+    return {"init_db_cold_s": round(total, 3), "populate_from_json_s": round(sum(populate_seconds), 3)}
+
+
+def _app_benchmarks(db_path: Path, draws: int, seed: int) -> tuple[dict, list[tuple]]:
+    """Функции app.py на БД db_path (вне сервера Streamlit, кэши — в памяти процесса).
+
+    Возвращает результаты и использованные id рецептов.
+    """
+    import streamlit as st
+
+    import app
+
+    quiet_streamlit_loggers()
+
+    app.DB_PATH = db_path
+    st.cache_resource.clear()
+
+    start = time.perf_counter()
+    app.get_filter_index().current()
+    index_load = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    combos = [
+        (meal, t, bool(mask & 1), bool(mask & 2), bool(mask & 4))
+        for meal in MEAL_TYPES
+        for t in TIME_STEPS
+        for mask in allowed_masks(7)
+    ]
+    filter_args = [rng.choice(combos) for _ in range(draws)]
+    with sqlite3.connect(db_path) as conn:
+        all_ids = [r[0] for r in conn.execute("SELECT id FROM recipes")]
+    id_args = [(rng.choice(all_ids),) for _ in range(draws)]
+    return {
+        "filter_index_load_ms": round(index_load * 1e3, 2),
+        "get_recipe": _timed(app.get_recipe, filter_args),
+        "get_ingredients": _timed(app.get_ingredients, id_args),
+        "get_steps": _timed(app.get_steps, id_args),
+        "get_full_recipe": _timed(app.get_full_recipe, id_args),
+    }, id_args
+
+
+def _formatting_benchmarks(id_args: list[tuple]) -> dict:
+    import app
+
+    recipes = [app.get_full_recipe(rid) for (rid,) in id_args[:500]]
+    ingredients = [(ing, i) for r in recipes for i, ing in enumerate(r["ingredients"], start=1)]
+    return {
+        "format_ingredient": _timed(format_ingredient, ingredients),
+        "_build_copy_text": _timed(_build_copy_text, [(r["name"], r["ingredients"]) for r in recipes]),
+        "_copy_button_html": _timed(_copy_button_html, [(r["name"], r["ingredients"], r["id"]) for r in recipes]),
+    }
+
+
+def run_size(n: int, tmp: Path, draws: int, seed: int) -> dict:
+    json_path = tmp / f"catalog_{n}.json"
+    db_path = tmp / f"catalog_{n}.db"
+    start = time.perf_counter()
+    write_catalog(json_path, n, seed)
+    result = {"recipes": n, "generate_s": round(time.perf_counter() - start, 3)}
+    result.update(_cold_init(db_path, json_path))
+    result["init_db_warm"] = _timed(init_db_module.init_db, [(db_path,)] * WARM_INIT_CALLS)
+    app_results, id_args = _app_benchmarks(db_path, draws, seed)
+    result.update(app_results)
+    result.update(_formatting_benchmarks(id_args))
+    result["db_mib"] = round(db_path.stat().st_size / 2**20, 1)
+    json_path.unlink()
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def run(sizes: list[int], draws: int, seed: int) -> dict:
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "draws": draws,
+            "seed": seed,
+        },
+        "results": [],
+    }
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_size(n, Path(tmp), draws, seed)
+        report["results"].append(result)
+        print(
+            f"{n:>9} рецептов: init_db {result['init_db_cold_s']:.2f} с "
+            f"(из них _populate_from_json {result['populate_from_json_s']:.2f} с), "
+            f"повторно {result['init_db_warm']['p50_us']:.0f} мкс; "
+            f"get_recipe {result['get_recipe']['p50_us']:.1f} мкс, "
+            f"get_full_recipe {result['get_full_recipe']['p50_us']:.0f} мкс"
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--draws", type=int, default=5000, help="вызовов на каждый бенчмарк")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="куда записать результаты (JSON)")
+    args = parser.parse_args()
+    report = run(args.sizes, args.draws, args.seed)
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
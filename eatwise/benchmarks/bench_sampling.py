@@ -0,0 +1,115 @@
+"""Задержка случайного выбора рецепта в зависимости от размера каталога.
+
+Сравнивает индексированную выборку (sampling.pick_random_recipe) и индекс
+в памяти (catalog_index.FilterIndex) с прежним ORDER BY RANDOM() LIMIT 1
+на синтетических каталогах разного размера.
+
+    cd eatwise
+    python3 -m benchmarks.bench_sampling --sizes 1000 10000 100000
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from catalog_index import FilterIndex
+from catalog_store import rebuild_sample_ranks
+from init_db import init_db
+from sampling import pick_random_recipe
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner"]
+
+
+def _fill_catalog(conn: sqlite3.Connection, n: int, seed: int = 0):
+    """Добавляет n синтетических рецептов (только таблица recipes)."""
+    rng = random.Random(seed)
+    rows = (
+        (
+            f"Рецепт {i}",
+            rng.choice(MEAL_TYPES),
+            rng.randrange(5, 121, 5),
+            int(rng.random() < 0.6),
+            int(rng.random() < 0.3),
+            int(rng.random() < 0.15),
+        )
+        for i in range(n)
+    )
+    conn.executemany(
+        """INSERT INTO recipes (name, meal_type, cook_time, needs_pan, needs_oven, needs_blender)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    rebuild_sample_ranks(conn.cursor())
+    conn.commit()
+
+
+def _random_filters(rng: random.Random) -> tuple:
+    return (
+        rng.choice(MEAL_TYPES),
+        rng.randrange(5, 121, 5),
+        rng.random() < 0.5,
+        rng.random() < 0.5,
+        rng.random() < 0.5,
+    )
+
+
+def _order_by_random(conn, meal_type, max_time, has_pan, has_oven, has_blender):
+    conditions = ["meal_type = ?", "cook_time <= ?"]
+    if not has_pan:
+        conditions.append("needs_pan = 0")
+    if not has_oven:
+        conditions.append("needs_oven = 0")
+    if not has_blender:
+        conditions.append("needs_blender = 0")
+    return conn.execute(
+        f"SELECT * FROM recipes WHERE {' AND '.join(conditions)} ORDER BY RANDOM() LIMIT 1",
+        (meal_type, max_time),
+    ).fetchone()
+
+
+def _time_per_call(fn, conn, draws: int, seed: int) -> float:
+    """Средняя задержка одного вызова, мкс."""
+    rng = random.Random(seed)
+    filters = [_random_filters(rng) for _ in range(draws)]
+    start = time.perf_counter()
+    for f in filters:
+        fn(conn, *f)
+    return (time.perf_counter() - start) / draws * 1e6
+
+
+def run(sizes: list[int], draws: int, baseline_draws: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            db_path = Path(tmp) / f"catalog_{n}.db"
+            init_db(db_path)
+            conn = sqlite3.connect(db_path)
+            _fill_catalog(conn, n)
+            indexed = _time_per_call(pick_random_recipe, conn, draws, seed=1)
+            baseline = _time_per_call(_order_by_random, conn, baseline_draws, seed=1)
+            index = FilterIndex.load(conn)
+            in_memory = _time_per_call(lambda _conn, *f: index.pick(*f), conn, draws, seed=1)
+            conn.close()
+            results.append(
+                {"recipes": n, "indexed_us": indexed, "in_memory_us": in_memory, "order_by_random_us": baseline}
+            )
+            print(
+                f"{n:>9} рецептов: индекс {indexed:9.1f} мкс, в памяти {in_memory:7.1f} мкс, "
+                f"ORDER BY RANDOM() {baseline:11.1f} мкс"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--draws", type=int, default=2000)
+    parser.add_argument("--baseline-draws", type=int, default=50)
+    args = parser.parse_args()
+    run(args.sizes, args.draws, args.baseline_draws)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Детерминированный генератор синтетических каталогов в формате recipes.json.
+
+Одинаковые n и seed дают байт-в-байт одинаковый файл, поэтому результаты
+бенчмарков сравнимы между коммитами. Рецепты похожи на настоящие: блюдо
+определяет тип приёма пищи, время и инструменты, ингредиенты берутся из
+общего набора продуктов с подходящими единицами из catalog_store.UNITS, шаги
+упоминают ингредиенты рецепта.
+
+    cd eatwise
+    python3 -m benchmarks.catalog 100000 -o /tmp/catalog_100k.json
+"""
+import argparse
+import json
+import logging
+import random
+from pathlib import Path
+
+# Блюдо: (название, типы приёма пищи, диапазон времени, вероятности сковороды, духовки, блендера)
+DISHES = [
+    ("Омлет", ("breakfast",), (10, 20), (0.95, 0.1, 0.0)),
+    ("Каша", ("breakfast",), (10, 35), (0.0, 0.05, 0.0)),
+    ("Сырники", ("breakfast",), (20, 40), (0.9, 0.2, 0.0)),
+    ("Блины", ("breakfast", "dinner"), (25, 50), (1.0, 0.0, 0.2)),
+    ("Смузи", ("breakfast", "lunch"), (5, 10), (0.0, 0.0, 1.0)),
+    ("Тосты", ("breakfast",), (5, 15), (0.7, 0.2, 0.0)),
+    ("Суп", ("lunch",), (30, 90), (0.4, 0.0, 0.1)),
+    ("Крем-суп", ("lunch",), (30, 60), (0.3, 0.0, 1.0)),
+    ("Салат", ("lunch", "dinner"), (10, 25), (0.1, 0.0, 0.0)),
+    ("Рагу", ("lunch", "dinner"), (40, 90), (0.8, 0.2, 0.0)),
+    ("Плов", ("lunch", "dinner"), (60, 120), (0.9, 0.0, 0.0)),
+    ("Паста", ("lunch", "dinner"), (15, 35), (0.9, 0.0, 0.0)),
+    ("Котлеты", ("lunch", "dinner"), (30, 60), (1.0, 0.3, 0.1)),
+    ("Запеканка", ("breakfast", "dinner"), (40, 90), (0.2, 1.0, 0.1)),
+    ("Запечённая рыба", ("dinner",), (30, 60), (0.0, 1.0, 0.0)),
+    ("Жаркое", ("dinner",), (45, 120), (0.7, 0.6, 0.0)),
+    ("Пирог", ("dinner", "breakfast"), (50, 120), (0.0, 1.0, 0.3)),
+    ("Соус", ("dinner",), (10, 30), (0.6, 0.0, 0.6)),
+]
+
+# Продукт: (название, [(единица, минимум, максимум, шаг)]); пустой диапазон — количество не указывается
+INGREDIENTS = [
+    ("Картофель", [("г", 200, 1500, 100), ("кг", 0.5, 2, 0.5), ("шт", 2, 8, 1)]),
+    ("Лук репчатый", [("шт", 1, 3, 1), ("г", 50, 300, 50)]),
+    ("Морковь", [("шт", 1, 3, 1), ("г", 100, 400, 50)]),
+    ("Чеснок", [("зубчик", 1, 5, 1)]),
+    ("Яйцо", [("шт", 1, 6, 1)]),
+    ("Молоко", [("мл", 100, 1000, 50), ("л", 0.5, 1.5, 0.5)]),
+    ("Сливки 10%", [("мл", 50, 300, 50)]),
+    ("Сливочное масло", [("г", 10, 100, 10), ("кусок", 1, 2, 1)]),
+    ("Масло растительное", [("для жарки", 0, 0, 0), ("ст.л.", 1, 4, 1)]),
+    ("Мука пшеничная", [("г", 50, 500, 50), ("ст.л.", 1, 5, 1)]),
+    ("Сахар", [("ч.л.", 1, 3, 1), ("г", 20, 200, 10)]),
+    ("Соль", [("по вкусу", 0, 0, 0)]),
+    ("Перец чёрный молотый", [("по вкусу", 0, 0, 0)]),
+    ("Паприка", [("ч.л.", 0.5, 2, 0.5)]),
+    ("Куриное филе", [("г", 300, 1000, 100)]),
+    ("Фарш свино-говяжий", [("г", 300, 1000, 100)]),
+    ("Говядина", [("г", 300, 1200, 100), ("кг", 0.5, 1.5, 0.5)]),
+    ("Филе трески", [("г", 300, 800, 100)]),
+    ("Лосось", [("г", 200, 600, 50)]),
+    ("Рис", [("г", 100, 500, 50)]),
+    ("Гречка", [("г", 100, 300, 50)]),
+    ("Овсяные хлопья", [("г", 50, 200, 25)]),
+    ("Макароны", [("г", 200, 500, 50)]),
+    ("Творог", [("г", 200, 600, 50)]),
+    ("Сыр твёрдый", [("г", 50, 300, 50)]),
+    ("Сметана", [("г", 50, 300, 50), ("ст.л.", 1, 4, 1)]),
+    ("Помидор", [("шт", 1, 4, 1), ("г", 100, 500, 50)]),
+    ("Огурец", [("шт", 1, 3, 1)]),
+    ("Болгарский перец", [("шт", 1, 3, 1)]),
+    ("Кабачок", [("шт", 1, 2, 1), ("г", 200, 800, 100)]),
+    ("Брокколи", [("г", 200, 500, 50)]),
+    ("Тыква", [("г", 300, 1000, 100)]),
+    ("Шпинат", [("г", 50, 200, 25)]),
+    ("Грибы шампиньоны", [("г", 200, 500, 50)]),
+    ("Банан", [("шт", 1, 3, 1)]),
+    ("Яблоко", [("шт", 1, 4, 1)]),
+    ("Ягоды замороженные", [("г", 100, 300, 50)]),
+    ("Мёд", [("ч.л.", 1, 3, 1), ("ст.л.", 1, 2, 1)]),
+    ("Лимонный сок", [("ст.л.", 1, 3, 1)]),
+    ("Зелень", [("по вкусу", 0, 0, 0), ("г", 10, 50, 10)]),
+    ("Томатная паста", [("ст.л.", 1, 3, 1)]),
+    ("Бульон", [("л", 1, 2, 0.5), ("мл", 300, 1000, 100)]),
+    ("Вода", [("мл", 100, 1500, 100), ("л", 1, 3, 0.5)]),
+    ("Специи", [("по вкусу", 0, 0, 0)]),
+]
+
+STEP_TEMPLATES = [
+    "Нарезаем {a} и {b}",
+    "Обжариваем {a} на среднем огне 5–7 минут",
+    "Смешиваем {a} с {b} до однородности",
+    "Добавляем {a}, солим и перчим по вкусу",
+    "Тушим под крышкой около {minutes} минут",
+    "Выкладываем {a} в форму и запекаем при 180 °C",
+    "Взбиваем {a} блендером",
+    "Доводим до кипения и варим {minutes} минут",
+    "Подаём, посыпав зеленью",
+]
+
+
+def _amount(rng: random.Random, low: float, high: float, step: float):
+    if step == 0:
+        return None
+    value = low + step * rng.randrange(int(round((high - low) / step)) + 1)
+    return int(value) if value == int(value) else round(value, 1)
+
+
+def generate_recipe(rng: random.Random, i: int) -> dict:
+    """Один синтетический рецепт в формате recipes.json."""
+    dish, meals, (t_min, t_max), (p_pan, p_oven, p_blender) = rng.choice(DISHES)
+    products = rng.sample(INGREDIENTS, rng.randint(3, 12))
+    ingredients = []
+    for name, units in products:
+        unit, low, high, step = rng.choice(units)
+        ingredients.append({"name": name, "amount": _amount(rng, low, high, step), "unit": unit})
+    names = [p[0].lower() for p in products]
+    steps = [
+        rng.choice(STEP_TEMPLATES).format(a=rng.choice(names), b=rng.choice(names), minutes=rng.randrange(5, 41, 5))
+        for _ in range(rng.randint(2, 8))
+    ]
+    return {
+        "name": f"{dish}: {names[0]} и {names[1]} №{i}",
+        "meal_type": rng.choice(meals),
+        "cook_time": rng.randrange(t_min, t_max + 1, 5),
+        "needs_pan": rng.random() < p_pan,
+        "needs_oven": rng.random() < p_oven,
+        "needs_blender": rng.random() < p_blender,
+        "ingredients": ingredients,
+        "steps": steps,
+    }
+
+
+def generate_catalog(n: int, seed: int = 0):
+    """Генератор n рецептов; одинаковые (n, seed) дают одинаковую последовательность."""
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        yield generate_recipe(rng, i)
+
+
+def write_catalog(path: Path, n: int, seed: int = 0) -> Path:
+    """Записывает каталог JSON-массивом потоково (память не зависит от n)."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i, recipe in enumerate(generate_catalog(n, seed)):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(recipe, ensure_ascii=False))
+        f.write("\n]\n")
+    return path
+
+
+def quiet_streamlit_loggers():
+    """Оставляет логгерам Streamlit только ошибки (вызывать после import streamlit).
+
+    Вне `streamlit run` Streamlit предупреждает об отсутствии контекста скрипта на каждый вызов.
+    """
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recipes", type=int, help="число рецептов")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="путь к JSON-файлу")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_catalog(args.output, args.recipes, args.seed)
+
+
+if __name__ == "__main__":
+    main()
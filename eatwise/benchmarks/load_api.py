@@ -0,0 +1,91 @@
+"""Нагрузочный тест HTTP API (api.py) на локальном экземпляре.
+
+Каждый из --concurrency клиентов держит keep-alive соединение и шлёт запросы
+по кругу из --paths, пока не истечёт --duration. Печатает пропускную
+способность, перцентили задержки и распределение статусов.
+
+    cd eatwise
+    python3 api.py &
+    python3 -m benchmarks.load_api --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import quote, urlsplit
+
+DEFAULT_PATHS = ["/recipe/1", "/random?meal_type=dinner", "/search?q=картофель"]
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+async def _client(host: str, port: int, requests: list[bytes], deadline: float, latencies: list, statuses: Counter):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        i = 0
+        while time.perf_counter() < deadline:
+            request = requests[i % len(requests)]
+            i += 1
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            status_line, *header_lines = head.decode("latin-1").split("\r\n")
+            length = 0
+            for line in header_lines:
+                name, _, value = line.partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            if length:
+                await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[int(status_line.split(" ")[1])] += 1
+    finally:
+        writer.close()
+
+
+async def run(url: str, paths: list[str], concurrency: int, duration: float, gzip: bool) -> dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    encoding = "Accept-Encoding: gzip\r\n" if gzip else ""
+    requests = [
+        f"GET {quote(p, safe='/?=&')} HTTP/1.1\r\nHost: {host}\r\n{encoding}\r\n".encode("latin-1") for p in paths
+    ]
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(
+        *(_client(host, port, requests[i:] + requests[:i], deadline, latencies, statuses) for i in range(concurrency))
+    )
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1e3, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1e3, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1e3, 3),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд")
+    parser.add_argument("--gzip", action="store_true", help="запрашивать gzip (Accept-Encoding)")
+    args = parser.parse_args()
+    stats = asyncio.run(run(args.url, args.paths, args.concurrency, args.duration, args.gzip))
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
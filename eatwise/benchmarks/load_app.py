@@ -0,0 +1,342 @@
+"""Нагрузочный тест приложения Streamlit: много одновременных сессий app.py.
+
+Сессии прогоняются через streamlit.testing.v1.AppTest, сеть не нужна.
+AppTest подменяет глобальный Runtime на время перезапуска и не допускает
+параллельных перезапусков в одном процессе, поэтому параллельность дают
+--workers процессов (как несколько серверов Streamlit на хосте с общей БД).
+В каждом процессе --sessions сессий по очереди делят общие кэши
+st.cache_resource (пул соединений, индексы, кэш отрисовки).
+
+Каждая сессия, пока не истечёт --duration, то меняет фильтры и нажимает
+«Что приготовить?», то (с вероятностью --link-ratio) открывает ссылку
+?recipe_id= во второй вкладке. Фоновый писатель раз в --write-interval
+секунд держит транзакцию записи --write-hold-ms миллисекунд (как
+sync_catalog.py) и меняет data_version.
+
+Отчёт (JSON): перцентили времени перезапуска скрипта по действиям (без
+первых открытий — в них входит подготовка AppTest), пропускная способность,
+время init_db, ошибки «database is locked» (запросы приложения, init_db,
+писатель), прирост RSS на сессию (вместе с объектами самого AppTest).
+По умолчанию БД собирается из
+синтетического каталога (benchmarks/catalog.py), --db — копия существующей.
+
+    cd eatwise
+    python3 -m benchmarks.load_app --recipes 10000 --workers 4 --sessions 8 --duration 30 --output load.json
+    python3 -m benchmarks.load_app --db recipes.db --snapshot
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import init_db as init_db_module
+from benchmarks.bench_app import MEAL_TYPES, TIME_STEPS, _cold_init, _git_commit
+from benchmarks.catalog import quiet_streamlit_loggers, write_catalog
+from benchmarks.load_api import _percentile
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+GENERATE_BUTTON = "Что приготовить?"
+LOCKED = "database is locked"
+MAX_ERROR_EXAMPLES = 5
+
+
+def _rss_bytes() -> int:
+    """Текущий RSS процесса (Linux); иначе — пиковый."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _latency(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(_percentile(samples, 50) * 1e3, 2),
+        "p95_ms": round(_percentile(samples, 95) * 1e3, 2),
+        "p99_ms": round(_percentile(samples, 99) * 1e3, 2),
+        "max_ms": round(samples[-1] * 1e3, 2) if samples else 0.0,
+    }
+
+
+class _Recorder:
+    """Замеры и ошибки одного процесса нагрузки."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.init_db: list[float] = []
+        self.errors: Counter = Counter()
+        self.examples: list[str] = []
+
+    def error(self, kind: str, message: str):
+        self.errors[kind] += 1
+        if len(self.examples) < MAX_ERROR_EXAMPLES:
+            self.examples.append(message)
+
+    def run(self, at, action: str | None, timeout: float):
+        """Перезапуск сессии at; action=None — не учитывать время (подготовка)."""
+        start = time.perf_counter()
+        try:
+            at.run(timeout=timeout)
+        except Exception as e:  # таймаут или падение самого AppTest
+            self.error(f"harness: {type(e).__name__}", str(e))
+            return
+        if action is not None:
+            self.latencies.setdefault(action, []).append(time.perf_counter() - start)
+        for exc in at.exception:
+            source = "init_db" if any("init_db.py" in line for line in exc.stack_trace) else "query"
+            self.error(f"{source}: {LOCKED}" if LOCKED in exc.proto.message else f"{source}: other", exc.proto.message)
+
+
+class _Session:
+    """Сессия пользователя: основная вкладка с генератором и вкладка для ссылок."""
+
+    def __init__(self, recorder: _Recorder, seed: int, timeout: float):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = random.Random(seed)
+        self.main = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+        self.link = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+        recorder.run(self.main, None, timeout)
+        recorder.run(self.link, None, timeout)
+
+    def step(self, recorder: _Recorder, ids: list[int], link_ratio: float, timeout: float):
+        rng = self.rng
+        if rng.random() < link_ratio:
+            self.link.query_params["recipe_id"] = str(rng.choice(ids))
+            recorder.run(self.link, "link", timeout)
+            return
+        at = self.main
+        try:
+            at.radio[0].set_value(rng.choice(MEAL_TYPES))
+            at.slider[0].set_value(rng.choice(TIME_STEPS))
+            for checkbox in at.checkbox[:3]:
+                checkbox.set_value(rng.random() < 0.5)
+            next(b for b in at.button if b.label == GENERATE_BUTTON).click()
+        except (IndexError, StopIteration) as e:  # прошлый перезапуск упал и не отрисовал фильтры
+            recorder.error("harness: no widgets", repr(e))
+            recorder.run(at, None, timeout)
+            return
+        recorder.run(at, "filters", timeout)
+
+
+def _worker(db_path: Path, ids: list[int], args, seed: int, barrier, results):
+    """Процесс нагрузки: args.sessions сессий по очереди до истечения args.duration."""
+    import streamlit as st
+
+    import db
+
+    quiet_streamlit_loggers()
+
+    recorder = _Recorder()
+    init_db = init_db_module.init_db
+
+    def timed_init_db(path):
+        start = time.perf_counter()
+        try:
+            init_db(path)
+        finally:
+            recorder.init_db.append(time.perf_counter() - start)
+
+    # Скрипт импортирует DB_PATH и init_db заново на каждом перезапуске
+    db.DB_PATH = db_path
+    init_db_module.init_db = timed_init_db
+    st.cache_resource.clear()
+
+    # Прогрев общих ресурсов процесса: дальше RSS растёт только за счёт сессий
+    _Session(_Recorder(), seed, args.timeout)
+    gc.collect()
+    rss_base = _rss_bytes()
+    sessions = [_Session(recorder, seed * 1000 + i, args.timeout) for i in range(args.sessions)]
+    recorder.latencies.clear()
+    recorder.init_db.clear()
+
+    barrier.wait()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    while time.perf_counter() < deadline:
+        for session in sessions:
+            session.step(recorder, ids, args.link_ratio, args.timeout)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    results.put(
+        {
+            "latencies": recorder.latencies,
+            "init_db": recorder.init_db,
+            "errors": dict(recorder.errors),
+            "examples": recorder.examples,
+            "seconds": elapsed,
+            "rss_base": rss_base,
+            "rss_end": _rss_bytes(),
+            "sessions": len(sessions),
+        }
+    )
+
+
+def _writer(db_path: Path, stop: threading.Event, interval: float, hold: float, stats: Counter):
+    """Периодическая транзакция записи, как у sync_catalog.py: держит блокировку hold секунд."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        while not stop.wait(interval):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+                time.sleep(hold)
+                conn.execute("COMMIT")
+                stats["commits"] += 1
+            except sqlite3.OperationalError as e:
+                stats["locked" if LOCKED in str(e) else "errors"] += 1
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+    finally:
+        conn.close()
+
+
+def _prepare_db(tmp: Path, db: Path | None, recipes: int, seed: int) -> Path:
+    """Рабочая БД во временной папке: копия --db или синтетический каталог."""
+    db_path = tmp / "load.db"
+    if db is None:
+        json_path = write_catalog(tmp / "catalog.json", recipes, seed)
+        _cold_init(db_path, json_path)
+        json_path.unlink()
+        return db_path
+    src = sqlite3.connect(f"{db.resolve().as_uri()}?mode=ro", uri=True)
+    dst = sqlite3.connect(db_path)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+    init_db_module.init_db(db_path)
+    return db_path
+
+
+def run(args) -> dict:
+    import streamlit as st
+
+    ctx = multiprocessing.get_context("spawn")
+    writer_stats: Counter = Counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _prepare_db(Path(tmp), args.db, args.recipes, args.seed)
+        with sqlite3.connect(db_path) as conn:
+            ids = [r[0] for r in conn.execute("SELECT id FROM recipes")]
+        if args.snapshot:
+            from snapshot import build_snapshot
+
+            snapshot_path = Path(tmp) / "load.snapshot"
+            build_snapshot(db_path, snapshot_path)
+            os.environ["EATWISE_SNAPSHOT"] = str(snapshot_path)  # наследуется процессами нагрузки
+
+        barrier = ctx.Barrier(args.workers + 1)
+        results = ctx.Queue()
+        workers = [
+            ctx.Process(target=_worker, args=(db_path, ids, args, args.seed + i + 1, barrier, results))
+            for i in range(args.workers)
+        ]
+        try:
+            for w in workers:
+                w.start()
+            barrier.wait(timeout=args.timeout * (2 * args.sessions + 2) + 60)
+            stop = threading.Event()
+            writer = None
+            if args.write_interval > 0:
+                writer = threading.Thread(
+                    target=_writer, args=(db_path, stop, args.write_interval, args.write_hold_ms / 1e3, writer_stats)
+                )
+                writer.start()
+            reports = [results.get() for _ in workers]
+            stop.set()
+            if writer is not None:
+                writer.join()
+        finally:
+            os.environ.pop("EATWISE_SNAPSHOT", None)
+            for w in workers:
+                w.join(timeout=args.timeout)
+                if w.is_alive():
+                    w.terminate()
+
+    latencies: dict[str, list[float]] = {}
+    errors: Counter = Counter()
+    for report in reports:
+        for action, samples in report["latencies"].items():
+            latencies.setdefault(action, []).extend(samples)
+        errors.update(report["errors"])
+    reruns = sum(len(v) for v in latencies.values())
+    seconds = max(r["seconds"] for r in reports)
+    sessions = sum(r["sessions"] for r in reports)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "streamlit": st.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "recipes": len(ids),
+            "db": str(args.db) if args.db else None,
+            "workers": args.workers,
+            "sessions_per_worker": args.sessions,
+            "duration_s": args.duration,
+            "link_ratio": args.link_ratio,
+            "write_interval_s": args.write_interval,
+            "write_hold_ms": args.write_hold_ms,
+            "snapshot": args.snapshot,
+            "seed": args.seed,
+        },
+        "reruns": reruns,
+        "seconds": round(seconds, 3),
+        "reruns_per_second": round(reruns / seconds, 1),
+        "latency": {
+            "all": _latency([x for v in latencies.values() for x in v]),
+            **{action: _latency(v) for action, v in sorted(latencies.items())},
+        },
+        "init_db": _latency([x for r in reports for x in r["init_db"]]),
+        "errors": dict(sorted(errors.items())),
+        "error_examples": [m for r in reports for m in r["examples"]][:MAX_ERROR_EXAMPLES],
+        "writer": dict(writer_stats),
+        "memory": {
+            "rss_base_mib": round(sum(r["rss_base"] for r in reports) / len(reports) / 2**20, 1),
+            "rss_end_mib": round(sum(r["rss_end"] for r in reports) / len(reports) / 2**20, 1),
+            "per_session_kib": round(sum(r["rss_end"] - r["rss_base"] for r in reports) / sessions / 1024, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, help="существующая БД (тест идёт на её копии)")
+    parser.add_argument("--recipes", type=int, default=10_000, help="размер синтетического каталога без --db")
+    parser.add_argument("--workers", type=int, default=4, help="процессов нагрузки")
+    parser.add_argument("--sessions", type=int, default=8, help="сессий в каждом процессе")
+    parser.add_argument("--duration", type=float, default=30.0, help="секунд")
+    parser.add_argument("--link-ratio", type=float, default=0.3, help="доля открытий ссылок ?recipe_id=")
+    parser.add_argument("--write-interval", type=float, default=2.0, help="секунд между записями (0 — без записи)")
+    parser.add_argument("--write-hold-ms", type=float, default=100.0, help="длительность транзакции записи")
+    parser.add_argument("--timeout", type=float, default=30.0, help="таймаут одного перезапуска, секунд")
+    parser.add_argument("--snapshot", action="store_true", help="собрать снимок каталога и включить EATWISE_SNAPSHOT")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="куда записать отчёт (JSON)")
+    args = parser.parse_args()
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Индекс фильтров генератора в памяти процесса.
+
+Фильтры генератора — meal_type, маска инструментов и максимальное время —
+образуют крошечное пространство, поэтому подходящие рецепты можно найти без
+SQL: для каждой группы (meal_type, tool_mask) хранится компактный массив id,
+упорядоченный по (cook_time, id), и параллельный массив cook_time. Рецепты
+группы с cook_time <= T — префикс массива, его длина находится бинарным поиском
+(это заменяет отдельные массивы для каждого шага слайдера времени).
+Индекс загружается из SQLite один раз и перезагружается в фоновом потоке,
+когда меняется data_version в таблице meta.
+"""
+import logging
+import random
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_right
+
+from db import ConnectionPool, read_data_version, read_transaction
+from sampling import allowed_masks, tool_mask
+
+RECIPE_KEYS = ("id", "name", "meal_type", "cook_time", "needs_pan", "needs_oven", "needs_blender")
+VERSION_CHECK_INTERVAL = 2.0  # секунд между проверками data_version
+
+logger = logging.getLogger("eatwise.index")
+
+
+class FilterIndex:
+    """Неизменяемый снимок каталога для выбора рецепта по фильтрам."""
+
+    def __init__(self, data_version: int, groups: dict, rows: dict):
+        self.data_version = data_version
+        self._groups = groups  # (meal_type, tool_mask) -> (array ids, array cook_times)
+        self._rows = rows  # id -> кортеж значений RECIPE_KEYS[1:]
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "FilterIndex":
+        """Строит индекс одним проходом по recipes (в одной транзакции чтения)."""
+        with read_transaction(conn):
+            data_version = read_data_version(conn)
+            groups: dict = {}
+            rows: dict = {}
+            for rid, name, meal_type, cook_time, pan, oven, blender, mask in conn.execute(
+                """SELECT id, name, meal_type, cook_time, needs_pan, needs_oven, needs_blender, tool_mask
+                   FROM recipes
+                   WHERE meal_type IS NOT NULL AND cook_time IS NOT NULL
+                   ORDER BY meal_type, tool_mask, cook_time, id"""
+            ):
+                rows[rid] = (name, meal_type, cook_time, pan, oven, blender)
+                key = (meal_type, mask)
+                if key not in groups:
+                    groups[key] = (array("q"), array("i"))
+                ids, times = groups[key]
+                ids.append(rid)
+                times.append(cook_time)
+        return cls(data_version, groups, rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def matching(self, meal_type: str, max_time: int, user_mask: int) -> list[tuple[array, int]]:
+        """Сегменты подходящих рецептов: (массив id группы, длина подходящего префикса)."""
+        segments = []
+        for mask in allowed_masks(user_mask):
+            group = self._groups.get((meal_type, mask))
+            if group is None:
+                continue
+            ids, times = group
+            k = bisect_right(times, max_time)
+            if k:
+                segments.append((ids, k))
+        return segments
+
+    def matching_ids(
+        self, meal_type: str, max_time: int, has_pan: bool, has_oven: bool, has_blender: bool
+    ) -> set[int]:
+        """Множество id рецептов, подходящих под фильтры."""
+        segments = self.matching(meal_type, max_time, tool_mask(has_pan, has_oven, has_blender))
+        return set().union(*(ids[:k] for ids, k in segments))
+
+    def count(self, meal_type: str, max_time: int, has_pan: bool, has_oven: bool, has_blender: bool) -> int:
+        """Число рецептов, подходящих под фильтры."""
+        user_mask = tool_mask(has_pan, has_oven, has_blender)
+        return sum(k for _, k in self.matching(meal_type, max_time, user_mask))
+
+    def pick(
+        self,
+        meal_type: str,
+        max_time: int,
+        has_pan: bool,
+        has_oven: bool,
+        has_blender: bool,
+        rng: random.Random | None = None,
+    ) -> dict | None:
+        """Равномерно выбирает рецепт среди подходящих под фильтры или None."""
+        segments = self.matching(meal_type, max_time, tool_mask(has_pan, has_oven, has_blender))
+        total = sum(k for _, k in segments)
+        if total == 0:
+            return None
+        r = (rng or random).randrange(total)
+        for ids, k in segments:
+            if r < k:
+                return self.recipe(ids[r])
+            r -= k
+        return None
+
+    def recipe(self, recipe_id: int) -> dict | None:
+        """Колонки рецепта (как у get_recipe_by_id) или None."""
+        row = self._rows.get(recipe_id)
+        if row is None:
+            return None
+        return dict(zip(RECIPE_KEYS, (recipe_id, *row)))
+
+
+class LiveIndex:
+    """Держит актуальный индекс в памяти: не чаще раза в VERSION_CHECK_INTERVAL
+    сверяет data_version с БД и при изменении перезагружает индекс через loader.
+
+    loader(conn) возвращает объект с атрибутом data_version (например,
+    FilterIndex.load). Общий для всех сессий процесса. Проверка версии и
+    перезагрузка идут в фоновом потоке: пока новый индекс строится, сессии
+    получают старый, и ждать приходится только первой загрузки.
+    """
+
+    def __init__(
+        self, pool: ConnectionPool, loader=FilterIndex.load, check_interval: float = VERSION_CHECK_INTERVAL
+    ):
+        self._pool = pool
+        self._loader = loader
+        self._check_interval = check_interval
+        self._cond = threading.Condition()
+        self._index = None
+        self._error: Exception | None = None
+        self._refreshing = False
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        index = error = None
+        try:
+            with self._pool.connection() as conn:
+                current = self._index
+                if current is None or read_data_version(conn) != current.data_version:
+                    index = self._loader(conn)
+        except Exception as e:
+            logger.exception("не удалось обновить индекс")
+            error = e
+        with self._cond:
+            if index is not None:
+                self._index = index
+            self._error = error
+            self._refreshing = False
+            # Если первая загрузка не удалась, следующий вызов сразу пробует снова
+            self._checked_at = 0.0 if self._index is None else time.monotonic()
+            self._cond.notify_all()
+
+    def _check(self):
+        if time.monotonic() - self._checked_at < self._check_interval:
+            return
+        with self._cond:
+            if self._refreshing or time.monotonic() - self._checked_at < self._check_interval:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="eatwise-index-refresh", daemon=True).start()
+
+    def loaded(self):
+        """Индекс без ожидания: None, пока идёт первая загрузка."""
+        self._check()
+        return self._index
+
+    def current(self):
+        """Актуальный индекс; при первом обращении ждёт загрузки."""
+        index = self.loaded()
+        if index is not None:
+            return index
+        with self._cond:
+            while self._index is None:
+                if not self._refreshing:
+                    raise self._error or RuntimeError("индекс не загружен")
+                self._cond.wait()
+            return self._index
@@ -0,0 +1,268 @@
+"""Запись рецептов каталога в БД: общие шаги для init_db, importer и sync_catalog.
+
+Разбор recipes.json, вставка рецептов с ингредиентами и шагами, content_hash,
+полнотекстовый индекс, tool_mask/sample_rank, вторичные индексы recipes и
+data_version. Транзакциями управляет вызывающий код.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from queries import hydrate_recipes
+
+# Единицы измерения: id -> name
+UNITS = [
+    (1, "г"),
+    (2, "кг"),
+    (3, "мл"),
+    (4, "л"),
+    (5, "ч.л."),
+    (6, "ст.л."),
+    (7, "по вкусу"),
+    (8, "для жарки"),
+    (9, "шт"),
+    (10, "кусок"),
+    (11, "зубчик"),
+]
+UNIT_NAME_TO_ID = {name: uid for uid, name in UNITS}
+UNIT_ID_TO_NAME = dict(UNITS)
+DEFAULT_UNIT_ID = 7  # «по вкусу»: для неизвестных единиц
+
+
+def iter_recipes_json(path: Path, chunk_size: int = 1 << 20):
+    """Потоково читает JSON-массив рецептов: в памяти одновременно один блок файла."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf, pos, started = "", 0, False
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                buf, pos = f.read(chunk_size), 0
+                if not buf:
+                    if started:
+                        raise ValueError(f"{path}: JSON-массив не закрыт")
+                    return
+                continue
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path}: ожидался JSON-массив рецептов")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                recipe, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Объект не поместился в блок — дочитываем
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield recipe
+
+
+def recipe_row(r: dict) -> tuple:
+    """Значения колонок recipes (без id) для рецепта в формате recipes.json."""
+    return (
+        r["name"],
+        r["meal_type"],
+        r["cook_time"],
+        1 if r.get("needs_pan") else 0,
+        1 if r.get("needs_oven") else 0,
+        1 if r.get("needs_blender") else 0,
+    )
+
+
+def child_rows(recipe_id: int, r: dict) -> tuple[list[tuple], list[tuple]]:
+    """Строки recipe_ingredients и recipe_steps для рецепта в формате recipes.json."""
+    ingredients = [
+        (recipe_id, i, ing["name"], ing.get("amount"), UNIT_NAME_TO_ID.get((ing.get("unit") or "").strip(), 7))
+        for i, ing in enumerate(r.get("ingredients", []), start=1)
+    ]
+    steps = [(recipe_id, i, step) for i, step in enumerate(r.get("steps", []), start=1)]
+    return ingredients, steps
+
+
+def insert_child_rows(cur, ingredient_rows: list[tuple], step_rows: list[tuple]):
+    cur.executemany(
+        "INSERT INTO recipe_ingredients (recipe_id, sort_order, name, amount, unit_id) VALUES (?, ?, ?, ?, ?)",
+        ingredient_rows,
+    )
+    cur.executemany(
+        "INSERT INTO recipe_steps (recipe_id, step_order, step_text) VALUES (?, ?, ?)",
+        step_rows,
+    )
+
+
+def _next_recipe_id(cur) -> int:
+    """Следующий свободный id: удалённые id не переиспользуются (ссылки ?recipe_id= не «переезжают»)."""
+    cur.execute(
+        """SELECT MAX(COALESCE(MAX(id), 0),
+                      COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'recipes'), 0))
+           FROM recipes"""
+    )
+    return cur.fetchone()[0] + 1
+
+
+def insert_recipes(cur, recipes, batch_size: int = 1000, progress=None) -> list[int]:
+    """Вставляет рецепты пачками через executemany. Возвращает id вставленных рецептов.
+
+    Рецепт с ключом "id" получает этот id, остальные — подряд после последнего
+    выданного. progress(count) вызывается после каждой пачки. tool_mask,
+    sample_rank и content_hash не заполняются — после загрузки нужны
+    rebuild_sample_ranks и update_content_hashes.
+    """
+    next_id = _next_recipe_id(cur)
+    inserted = []
+    recipe_rows, ingredient_rows, step_rows = [], [], []
+
+    def flush():
+        cur.executemany(
+            """INSERT INTO recipes (id, name, meal_type, cook_time, needs_pan, needs_oven, needs_blender)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            recipe_rows,
+        )
+        insert_child_rows(cur, ingredient_rows, step_rows)
+        recipe_rows.clear()
+        ingredient_rows.clear()
+        step_rows.clear()
+        if progress is not None:
+            progress(len(inserted))
+
+    for r in recipes:
+        if r.get("id") is not None:
+            recipe_id = int(r["id"])
+            next_id = max(next_id, recipe_id + 1)
+        else:
+            recipe_id = next_id
+            next_id += 1
+        recipe_rows.append((recipe_id, *recipe_row(r)))
+        ingredients, steps = child_rows(recipe_id, r)
+        ingredient_rows.extend(ingredients)
+        step_rows.extend(steps)
+        inserted.append(recipe_id)
+        if len(recipe_rows) >= batch_size:
+            flush()
+    if recipe_rows:
+        flush()
+    return inserted
+
+
+def rebuild_sample_ranks(
+    cur, groups: list[tuple[str, int]] | None = None, ids: list[int] | None = None
+):
+    """Пересчитывает tool_mask и sample_rank (см. sampling.py).
+
+    groups — список (meal_type, tool_mask), которые затронуло изменение данных;
+    None — пересчитать весь каталог. ids — рецепты, у которых мог измениться
+    tool_mask (вставленные и обновлённые); None — проверить все.
+    """
+    mask = "(needs_pan <> 0) | ((needs_oven <> 0) << 1) | ((needs_blender <> 0) << 2)"
+    if ids is None:
+        cur.execute(f"UPDATE recipes SET tool_mask = {mask} WHERE tool_mask IS NOT ({mask})")
+    elif ids:
+        cur.execute(
+            f"UPDATE recipes SET tool_mask = {mask} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+        )
+    ranked = """
+        UPDATE recipes SET sample_rank = r.rnk
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY meal_type, tool_mask ORDER BY cook_time, id) AS rnk
+            FROM recipes
+            WHERE cook_time IS NOT NULL AND meal_type IS NOT NULL {where}
+        ) AS r
+        WHERE recipes.id = r.id AND recipes.sample_rank IS NOT r.rnk
+    """
+    if groups is None:
+        cur.execute("UPDATE recipes SET sample_rank = NULL WHERE cook_time IS NULL OR meal_type IS NULL")
+        cur.execute(ranked.format(where=""))
+        return
+    for meal_type, mask in set(groups):
+        cur.execute(ranked.format(where="AND meal_type = ? AND tool_mask = ?"), (meal_type, mask))
+
+
+# Вторичные индексы recipes; массовый импорт удаляет их на время загрузки
+RECIPE_INDEXES = {
+    "idx_recipes_filter": "recipes (meal_type, tool_mask, cook_time, sample_rank)",
+    "idx_recipes_sample": "recipes (meal_type, tool_mask, sample_rank)",
+}
+
+
+def create_recipe_indexes(cur):
+    for name, definition in RECIPE_INDEXES.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def drop_recipe_indexes(cur):
+    for name in RECIPE_INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def bump_data_version(cur):
+    """Отмечает изменение данных каталога: кэши и индексы в памяти перезагрузятся."""
+    cur.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+
+def recipe_content_hash(r: dict) -> str:
+    """Хэш содержимого рецепта: название, атрибуты, ингредиенты и шаги.
+
+    Принимает рецепт как в recipes.json, так и из hydrate_recipes: единицы
+    приводятся к тому, что реально хранится в БД, поэтому хэши совпадают.
+    """
+    canonical = [
+        *recipe_row(r),
+        [
+            [
+                ing["name"],
+                None if ing.get("amount") is None else float(ing["amount"]),
+                UNIT_ID_TO_NAME[UNIT_NAME_TO_ID.get((ing.get("unit") or "").strip(), 7)],
+            ]
+            for ing in r.get("ingredients", [])
+        ],
+        list(r.get("steps", [])),
+    ]
+    payload = json.dumps(canonical, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def update_content_hashes(cur, ids: list[int] | None = None, chunk_size: int = 1000):
+    """Пересчитывает content_hash по данным в БД (ids=None — для рецептов без хэша)."""
+    if ids is None:
+        cur.execute("SELECT id FROM recipes WHERE content_hash IS NULL")
+        ids = [row[0] for row in cur.fetchall()]
+    for start in range(0, len(ids), chunk_size):
+        recipes = hydrate_recipes(cur.connection, ids[start : start + chunk_size])
+        cur.executemany(
+            "UPDATE recipes SET content_hash = ? WHERE id = ?",
+            [(recipe_content_hash(r), r["id"]) for r in recipes],
+        )
+
+
+def _fold_sql(expr: str) -> str:
+    """SQL-выражение: ё -> е (токенизатор unicode61 их не отождествляет)."""
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def refresh_search_index(cur, ids: list[int] | None = None):
+    """Пересобирает строки recipes_fts для рецептов ids (None — весь каталог).
+
+    Рецепты, которых уже нет в recipes, из индекса удаляются.
+    """
+    select = f"""
+        INSERT INTO recipes_fts (rowid, name, ingredients, steps)
+        SELECT r.id,
+               {_fold_sql("r.name")},
+               {_fold_sql("(SELECT group_concat(i.name, ' ') FROM recipe_ingredients i WHERE i.recipe_id = r.id)")},
+               {_fold_sql("(SELECT group_concat(s.step_text, ' ') FROM recipe_steps s WHERE s.recipe_id = r.id)")}
+        FROM recipes r
+    """
+    if ids is None:
+        cur.execute("DELETE FROM recipes_fts")
+        cur.execute(select)
+        return
+    ids_json = json.dumps(ids)
+    cur.execute("DELETE FROM recipes_fts WHERE rowid IN (SELECT value FROM json_each(?))", (ids_json,))
+    cur.execute(select + " WHERE r.id IN (SELECT value FROM json_each(?))", (ids_json,))
@@ -0,0 +1,122 @@
+"""Общий слой соединений с SQLite: пул read-only соединений для запросов приложения."""
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from metrics import connect
+
+DB_PATH = Path(__file__).parent / "recipes.db"
+
+POOL_SIZE = 8
+POOL_TIMEOUT = 10.0  # секунд ожидания свободного соединения
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 16 * 1024
+STATEMENT_CACHE_SIZE = 128
+
+# Колонки рецепта, которые видит приложение (без служебных tool_mask, sample_rank)
+RECIPE_COLUMNS = "id, name, meal_type, cook_time, needs_pan, needs_oven, needs_blender"
+
+
+def read_data_version(conn: sqlite3.Connection) -> int:
+    """Версия данных каталога: растёт при каждом изменении рецептов (таблица meta)."""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    return row[0] if row else 0
+
+
+@contextmanager
+def read_transaction(conn: sqlite3.Connection):
+    """Транзакция чтения: все запросы блока видят один снимок БД.
+
+    Если соединение уже в транзакции (например, внутри записи), блок выполняется
+    в ней и не завершает её.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+class ConnectionPool:
+    """Потокобезопасный пул read-only соединений, общий для всех сессий процесса.
+
+    Streamlit выполняет скрипт каждой сессии в своём потоке, поэтому соединения
+    открываются с check_same_thread=False, но в каждый момент времени принадлежат
+    ровно одному потоку: их выдаёт и забирает connection().
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT):
+        self._db_path = Path(db_path)
+        self._size = size
+        self._timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect(
+            f"{self._db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self._timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"пул соединений исчерпан: нет свободного соединения за {self._timeout:.1f} с"
+            ) from None
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Выдаёт соединение из пула на время блока with и возвращает его обратно."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Закрывает все свободные соединения пула."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self._lock:
+                self._created -= 1
@@ -0,0 +1,53 @@
+"""Колода рецептов сессии: «Что приготовить?» без повторов, пока колода не кончится.
+
+Колода — перетасованный компактный массив id рецептов, подходящих под
+фильтры сессии; очередной рецепт снимается с конца за O(1). Колода привязана
+к фильтрам и к data_version индекса: при их смене строится заново.
+"""
+import random
+from array import array
+
+from catalog_index import FilterIndex
+from sampling import tool_mask
+
+
+def filters_key(filters: dict) -> tuple:
+    """Хэшируемый ключ фильтров генератора."""
+    return tuple(sorted(filters.items()))
+
+
+class RecipeDeck:
+    """Перетасованные id рецептов под фильтры одной сессии (хранится в st.session_state)."""
+
+    def __init__(self, key: tuple, ids: array):
+        self.key = key
+        self._ids = ids
+
+    @classmethod
+    def build(
+        cls, index: FilterIndex, filters: dict, avoid: int | None = None, rng: random.Random | None = None
+    ) -> "RecipeDeck":
+        """Новая перетасованная колода; avoid — id, который не должен выпасть первым."""
+        user_mask = tool_mask(filters["has_pan"], filters["has_oven"], filters["has_blender"])
+        ids = array("q")
+        for group_ids, k in index.matching(filters["meal_type"], filters["max_time"], user_mask):
+            ids.extend(group_ids[:k])
+        (rng or random).shuffle(ids)
+        if len(ids) > 1 and ids[-1] == avoid:
+            ids[-1], ids[0] = ids[0], ids[-1]
+        return cls((index.data_version, filters_key(filters)), ids)
+
+    def fits(self, index: FilterIndex, filters: dict) -> bool:
+        """Подходит ли колода под текущие фильтры и версию данных."""
+        return self.key == (index.data_version, filters_key(filters))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def draw(self) -> int | None:
+        """Снимает следующий id (None — колода пуста)."""
+        return self._ids.pop() if self._ids else None
+
+    def peek(self) -> int | None:
+        """Следующий id без снятия (для фоновой подгрузки)."""
+        return self._ids[-1] if self._ids else None
@@ -0,0 +1,215 @@
+"""Экспорт статических HTML-страниц рецептов для ссылок ?recipe_id=.
+
+Каждый рецепт — отдельная страница <id>.html в той же раскладке, что и в
+приложении (с кнопкой «Скопировать ингредиенты»), плюс index.html со списком
+рецептов и sitemap.xml (если указан --base-url). Страницы можно раздавать с
+диска или CDN; ссылки на них перенаправляет прокси (см. README), а приложение
+при заданной EATWISE_STATIC_URL показывает кнопку на выгруженную страницу.
+
+Экспорт инкрементальный: manifest.json хранит content_hash каждой выгруженной
+страницы, и пересобираются только изменившиеся и новые рецепты; страницы
+удалённых рецептов удаляются.
+
+    python3 eatwise/export_static.py [--out eatwise/static_recipes] [--db eatwise/recipes.db]
+                                     [--base-url https://cdn.example.com/recipes/] [--full]
+"""
+import argparse
+import json
+import os
+import sqlite3
+from html import escape
+from pathlib import Path
+
+from db import DB_PATH
+from formatting import MEAL_LABELS, _copy_button_html, format_ingredient, format_used_tools
+from init_db import init_db
+from queries import hydrate_recipes
+
+EXPORT_DIR = Path(__file__).parent / "static_recipes"
+MANIFEST_NAME = "manifest.json"
+PAGE_FORMAT = 2  # увеличить при изменении шаблона страниц: все страницы пересоберутся
+HYDRATE_BATCH = 500
+SITEMAP_MAX_URLS = 50_000  # ограничение протокола sitemaps на один файл
+
+_STYLE = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; max-width: 46rem; margin: 2rem auto;
+       padding: 0 1rem; line-height: 1.5; color: #262730; }
+.title { background: #dff5e3; color: #177233; border-radius: 0.5rem; padding: 1rem; font-weight: bold; }
+.caption { color: #808495; font-size: 0.9rem; }
+hr { border: none; border-top: 1px solid #e6e6ea; margin: 1.5rem 0; }
+"""
+
+
+def recipe_page_name(recipe_id: int) -> str:
+    """Имя файла страницы рецепта в каталоге экспорта."""
+    return f"{recipe_id}.html"
+
+
+def _page(title: str, body: str, canonical: str | None = None) -> str:
+    link = f'\n<link rel="canonical" href="{escape(canonical)}">' if canonical else ""
+    return f"""<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{escape(title)}</title>{link}
+<style>{_STYLE}</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def render_recipe_page(recipe: dict, base_url: str | None = None) -> str:
+    """HTML-страница рецепта (recipe — с ingredients и steps, как у hydrate_recipes)."""
+    parts = [
+        '<p><a href="index.html">← Все рецепты</a></p>',
+        "<h1>🍳 EatWise</h1>",
+        f'<div class="title">{escape(recipe["name"])}</div>',
+        f"<p>⏱ <b>Время приготовления:</b> {recipe['cook_time']} мин</p>",
+    ]
+    tools = format_used_tools(recipe)
+    if tools:
+        parts.append(f"<p>🛠 <b>Используемые инструменты:</b> {escape(', '.join(tools))}</p>")
+    parts += ["<hr>", "<h2>📋 Ингредиенты</h2>"]
+    ingredients = recipe["ingredients"]
+    if ingredients:
+        parts += [f"<p>{escape(format_ingredient(ing, i))}</p>" for i, ing in enumerate(ingredients, start=1)]
+        parts.append(_copy_button_html(recipe["name"], ingredients, recipe["id"], page_link=True))
+    else:
+        parts.append('<p class="caption">Ингредиенты не указаны.</p>')
+    parts += ["<hr>", "<h2>👨‍🍳 Пошаговые инструкции</h2>"]
+    if recipe["steps"]:
+        parts += [f"<p><b>{i}.</b> {escape(step)}</p>" for i, step in enumerate(recipe["steps"], start=1)]
+    else:
+        parts.append('<p class="caption">Инструкции не указаны.</p>')
+    canonical = base_url + recipe_page_name(recipe["id"]) if base_url else None
+    return _page(f"{recipe['name']} — EatWise", "\n".join(parts), canonical)
+
+
+def _render_index(recipes: list[tuple]) -> str:
+    """Список всех рецептов по типам приёма пищи (recipes — (id, name, meal_type))."""
+    by_meal: dict = {}
+    for rid, name, meal_type in recipes:
+        by_meal.setdefault(meal_type, []).append((name, rid))
+    parts = ["<h1>🍳 EatWise — все рецепты</h1>"]
+    order = {meal: i for i, meal in enumerate(MEAL_LABELS)}
+    for meal_type in sorted(by_meal, key=lambda m: (order.get(m, len(order)), str(m))):
+        parts.append(f"<h2>{escape(MEAL_LABELS.get(meal_type, str(meal_type)))}</h2>")
+        parts.append("<ul>")
+        parts += [
+            f'<li><a href="{recipe_page_name(rid)}">{escape(name)}</a></li>' for name, rid in sorted(by_meal[meal_type])
+        ]
+        parts.append("</ul>")
+    return _page("EatWise — все рецепты", "\n".join(parts))
+
+
+def _sitemap(urls: list[str]) -> str:
+    entries = "".join(f"<url><loc>{escape(u)}</loc></url>\n" for u in urls)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{entries}</urlset>\n'
+    )
+
+
+def _write_sitemaps(out_dir: Path, base_url: str, ids: list[int]):
+    """sitemap.xml; при больших каталогах — индекс sitemap.xml и файлы sitemap-N.xml."""
+    urls = [base_url + "index.html"] + [base_url + recipe_page_name(rid) for rid in ids]
+    for old in out_dir.glob("sitemap-*.xml"):
+        old.unlink()
+    if len(urls) <= SITEMAP_MAX_URLS:
+        _write_atomic(out_dir / "sitemap.xml", _sitemap(urls))
+        return
+    names = []
+    for n, start in enumerate(range(0, len(urls), SITEMAP_MAX_URLS), start=1):
+        names.append(f"sitemap-{n}.xml")
+        _write_atomic(out_dir / names[-1], _sitemap(urls[start : start + SITEMAP_MAX_URLS]))
+    entries = "".join(f"<sitemap><loc>{escape(base_url + name)}</loc></sitemap>\n" for name in names)
+    _write_atomic(
+        out_dir / "sitemap.xml",
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{entries}</sitemapindex>\n',
+    )
+
+
+def _write_atomic(path: Path, text: str):
+    """Запись через временный файл и os.replace: читатели не видят недописанную страницу."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_manifest(out_dir: Path) -> dict:
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def export_static(
+    db_path: Path = DB_PATH, out_dir: Path = EXPORT_DIR, base_url: str | None = None, full: bool = False
+) -> dict:
+    """Выгружает страницы рецептов в out_dir. Возвращает сводку: written/deleted/unchanged.
+
+    full — пересобрать все страницы, не глядя на manifest.json.
+    """
+    if base_url and not base_url.endswith("/"):
+        base_url += "/"
+    init_db(db_path)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(out_dir)
+    previous = manifest.get("pages", {})  # id -> content_hash выгруженных страниц
+    if full or manifest.get("format") != PAGE_FORMAT or manifest.get("base_url") != base_url:
+        exported = {}
+    else:
+        exported = previous
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")  # страницы и manifest из одного снимка БД
+        rows = conn.execute("SELECT id, name, meal_type, content_hash FROM recipes ORDER BY id").fetchall()
+        pages = {str(rid): content_hash for rid, _, _, content_hash in rows}
+        changed = [
+            rid
+            for rid, _, _, content_hash in rows
+            if exported.get(str(rid)) != content_hash or not (out_dir / recipe_page_name(rid)).exists()
+        ]
+        for start in range(0, len(changed), HYDRATE_BATCH):
+            for recipe in hydrate_recipes(conn, changed[start : start + HYDRATE_BATCH]):
+                _write_atomic(out_dir / recipe_page_name(recipe["id"]), render_recipe_page(recipe, base_url))
+    finally:
+        conn.close()
+
+    deleted = [rid for rid in previous if rid not in pages]
+    for rid in deleted:
+        (out_dir / recipe_page_name(int(rid))).unlink(missing_ok=True)
+    if changed or deleted or not (out_dir / "index.html").exists():
+        _write_atomic(out_dir / "index.html", _render_index([(rid, name, meal) for rid, name, meal, _ in rows]))
+        if base_url:
+            _write_sitemaps(out_dir, base_url, [rid for rid, _, _, _ in rows])
+    _write_atomic(
+        out_dir / MANIFEST_NAME,
+        json.dumps({"format": PAGE_FORMAT, "base_url": base_url, "pages": pages}, separators=(",", ":")),
+    )
+    return {"written": len(changed), "deleted": len(deleted), "unchanged": len(rows) - len(changed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт статических HTML-страниц рецептов.")
+    parser.add_argument("--out", type=Path, default=EXPORT_DIR, help="каталог страниц (по умолчанию %(default)s)")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="путь к БД (по умолчанию %(default)s)")
+    parser.add_argument("--base-url", help="адрес, по которому раздаются страницы (для sitemap.xml)")
+    parser.add_argument("--full", action="store_true", help="пересобрать все страницы")
+    args = parser.parse_args()
+
+    summary = export_static(args.db, args.out, args.base_url, args.full)
+    print(
+        f"Страниц записано {summary['written']}, удалено {summary['deleted']}, "
+        f"без изменений {summary['unchanged']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Форматирование рецептов для показа: строки ингредиентов, инструменты, кнопка копирования.
+
+Без зависимости от Streamlit — используется приложением и экспортом статических страниц.
+"""
+import json
+
+MEAL_LABELS = {"breakfast": "Завтрак", "lunch": "Обед", "dinner": "Ужин"}
+TOOL_COLUMNS = [
+    ("needs_pan", "Сковорода"),
+    ("needs_oven", "Духовка"),
+    ("needs_blender", "Блендер"),
+]
+
+
+def format_used_tools(recipe: dict) -> list[str]:
+    """Список использованных инструментов по-русски."""
+    used = []
+    for col, label in TOOL_COLUMNS:
+        if recipe.get(col):
+            used.append(label)
+    return used
+
+
+def _format_amount(amount: float) -> str:
+    """Количество: целое или один знак после запятой (русский формат)."""
+    if amount is None:
+        return ""
+    if amount == int(amount):
+        return str(int(amount))
+    return str(round(amount, 1)).replace(".", ",")
+
+
+def format_ingredient(ing: dict, num: int) -> str:
+    """Форматирует один ингредиент: '1) Название — количество единица' или '1) Название — по вкусу'."""
+    name = ing["name"]
+    amount = ing.get("amount")
+    unit = (ing.get("unit") or "").strip()
+    if amount is not None and unit and unit not in ("по вкусу", "для жарки"):
+        return f"{num}) {name} — {_format_amount(amount)} {unit}"
+    if unit in ("по вкусу", "для жарки"):
+        return f"{num}) {name} — {unit}"
+    if amount is not None:
+        return f"{num}) {name} — {_format_amount(amount)}"
+    return f"{num}) {name}"
+
+
+def _build_copy_text(recipe_name: str, ingredients: list[dict]) -> str:
+    """Собирает текст для копирования: название и нумерованные ингредиенты (ссылку добавляет JS)."""
+    lines = [recipe_name]
+    for i, ing in enumerate(ingredients, start=1):
+        lines.append(format_ingredient(ing, i))
+    return "\n".join(lines)
+
+
+def _copy_button_html(
+    recipe_name: str, ingredients: list[dict], recipe_id: int | None = None, page_link: bool = False
+) -> str:
+    """HTML/JS кнопки «Скопировать ингредиенты»: копирует в буфер название, ингредиенты и ссылку.
+
+    Без recipe_id (список покупок) ссылка на рецепт не добавляется. page_link —
+    ссылкой служит адрес самой страницы (статическая страница рецепта), а не ?recipe_id=.
+    """
+    copy_body = _build_copy_text(recipe_name, ingredients)
+    if recipe_id is None:
+        toast_text = "Список покупок скопирован в буфер обмена!"
+    else:
+        toast_text = "Список ингредиентов и ссылка на рецепт скопированы в буфер обмена!"
+    # JSON-строка — корректный JS-литерал (кавычки, \r, U+2028 экранируются), а «</» — чтобы
+    # «</script>» в названии рецепта не закрыл тег
+    copy_body_js = json.dumps(copy_body).replace("</", "<\\/")
+    html = f"""
+    <div id="copy-block">
+        <button id="copy-btn" type="button" style="
+            padding: 0.4rem 0.8rem;
+            border-radius: 6px;
+            border: 1px solid #ccc;
+            background: #f0f2f6;
+            cursor: pointer;
+            font-size: 0.9rem;
+        ">Скопировать ингредиенты</button>
+        <span id="copy-toast" style="margin-left: 0.5rem; color: green; font-size: 0.9rem; display: none;">{toast_text}</span>
+    </div>
+    <script>
+        (function() {{
+            var btn = document.getElementById('copy-btn');
+            var toast = document.getElementById('copy-toast');
+            var body = {copy_body_js};
+            var recipeId = {"null" if recipe_id is None else recipe_id};
+            var pageLink = {"true" if page_link else "false"};
+            function showToast() {{
+                toast.style.display = 'inline';
+                setTimeout(function() {{ toast.style.display = 'none'; }}, 3000);
+            }}
+            function fallbackCopy(text) {{
+                var ta = document.createElement('textarea');
+                ta.value = text;
+                ta.style.position = 'fixed';
+                ta.style.left = '-9999px';
+                document.body.appendChild(ta);
+                ta.select();
+                try {{
+                    document.execCommand('copy');
+                }} catch (e) {{}}
+                document.body.removeChild(ta);
+            }}
+            btn.onclick = function() {{
+                var full = body;
+                if (recipeId !== null) {{
+                    var link;
+                    if (pageLink) {{
+                        link = window.location.href.split('#')[0];
+                    }} else {{
+                        var loc = window.top && window.top.location ? window.top.location : window.location;
+                        var base = loc.origin + (loc.pathname || '/');
+                        if (!base.endsWith('/')) base += '/';
+                        link = base + '?recipe_id=' + recipeId;
+                    }}
+                    full += '\\nСсылка на рецепт: ' + link;
+                }}
+                if (navigator.clipboard && typeof navigator.clipboard.writeText === 'function') {{
+                    navigator.clipboard.writeText(full).then(showToast).catch(function() {{ fallbackCopy(full); showToast(); }});
+                }} else {{
+                    fallbackCopy(full);
+                    showToast();
+                }}
+            }};
+        }})();
+    </script>
+    """
+    return html
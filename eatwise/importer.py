@@ -0,0 +1,122 @@
+"""Массовый импорт большого каталога рецептов из JSON.
+
+Файл читается потоково (память не зависит от размера каталога), строки
+вставляются пачками через executemany в одной транзакции. Если загружается
+много рецептов относительно уже имеющихся, вторичные индексы recipes удаляются
+на время загрузки и строятся заново в конце; небольшое дополнение к большому
+каталогу обновляет индексы и поиск только для добавленных рецептов.
+
+    python3 eatwise/importer.py catalog.json [--db eatwise/recipes.db] [--batch-size 5000]
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from catalog_store import (
+    bump_data_version,
+    create_recipe_indexes,
+    drop_recipe_indexes,
+    insert_recipes,
+    iter_recipes_json,
+    rebuild_sample_ranks,
+    refresh_search_index,
+    update_content_hashes,
+)
+from db import DB_PATH
+from init_db import init_db
+from sampling import tool_mask
+
+BATCH_SIZE = 5000
+# Индексы пересобираются целиком, если добавляется больше этой доли уже имеющихся рецептов
+REBUILD_RATIO = 0.2
+PROGRESS_EVERY = 10.0  # секунд между строками прогресса
+
+
+def bulk_import(db_path: Path, json_path: Path, batch_size: int = BATCH_SIZE, progress=None) -> dict:
+    """Добавляет рецепты из json_path в БД. Возвращает статистику импорта.
+
+    progress(count, elapsed) вызывается после каждой пачки. Новая БД создаётся
+    пустой: рецепт-пример из recipes.json в неё не попадает.
+    """
+    init_db(db_path, seed=False)
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA cache_size = -262144")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        existing = cur.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+        rebuild = not existing
+        if rebuild:
+            drop_recipe_indexes(cur)
+        groups = set()  # (meal_type, tool_mask) добавленных рецептов
+
+        def on_batch(count):
+            nonlocal rebuild
+            # Размер файла заранее не известен: индексы удаляются, как только загружено много
+            if not rebuild and count > existing * REBUILD_RATIO:
+                drop_recipe_indexes(cur)
+                rebuild = True
+            if progress is not None:
+                progress(count, time.perf_counter() - started)
+
+        def tracked(recipes):
+            for r in recipes:
+                groups.add((r["meal_type"], tool_mask(r.get("needs_pan"), r.get("needs_oven"), r.get("needs_blender"))))
+                yield r
+
+        ids = insert_recipes(cur, tracked(iter_recipes_json(json_path)), batch_size=batch_size, progress=on_batch)
+        loaded = time.perf_counter()
+        update_content_hashes(cur, ids)
+        if rebuild:
+            refresh_search_index(cur)
+            rebuild_sample_ranks(cur)
+            create_recipe_indexes(cur)
+        else:
+            refresh_search_index(cur, ids)
+            rebuild_sample_ranks(cur, list(groups), ids)
+        bump_data_version(cur)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    finished = time.perf_counter()
+    return {
+        "recipes": len(ids),
+        "load_seconds": loaded - started,
+        "index_seconds": finished - loaded,
+        "total_seconds": finished - started,
+        "recipes_per_second": len(ids) / (finished - started) if finished > started else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовый импорт рецептов из JSON в SQLite.")
+    parser.add_argument("json_path", type=Path, help="JSON-массив рецептов в формате recipes.json")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="путь к БД (по умолчанию %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    last_report = [0.0]
+
+    def report(count, elapsed):
+        if elapsed - last_report[0] >= PROGRESS_EVERY:
+            last_report[0] = elapsed
+            print(f"  {count} рецептов, {count / elapsed:.0f} рецептов/с", file=sys.stderr)
+
+    stats = bulk_import(args.db, args.json_path, batch_size=args.batch_size, progress=report)
+    print(
+        f"Импортировано {stats['recipes']} рецептов за {stats['total_seconds']:.1f} с "
+        f"(загрузка {stats['load_seconds']:.1f} с, индексы {stats['index_seconds']:.1f} с, "
+        f"{stats['recipes_per_second']:.0f} рецептов/с)."
+    )
+
+
+if __name__ == "__main__":
+    main()
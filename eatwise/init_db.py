@@ -1,26 +1,38 @@
 """Initialize SQLite database with recipes, ingredients, and steps."""
-import json
+import argparse
+import logging
 import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
 
-DB_PATH = Path(__file__).parent / "recipes.db"
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from catalog_store import (
+    DEFAULT_UNIT_ID,
+    UNITS,
+    create_recipe_indexes,
+    insert_recipes,
+    iter_recipes_json,
+    rebuild_sample_ranks,
+    refresh_search_index,
+    update_content_hashes,
+)
+from db import DB_PATH
+from metrics import connect
+
 RECIPES_JSON_PATH = Path(__file__).parent / "recipes.json"
 
-# Единицы измерения: id -> name
-UNITS = [
-    (1, "г"),
-    (2, "кг"),
-    (3, "мл"),
-    (4, "л"),
-    (5, "ч.л."),
-    (6, "ст.л."),
-    (7, "по вкусу"),
-    (8, "для жарки"),
-    (9, "шт"),
-    (10, "кусок"),
-    (11, "зубчик"),
-]
-UNIT_NAME_TO_ID = {name: uid for uid, name in UNITS}
+# Семейства совместимых единиц: id -> (id базовой единицы, множитель к базовой)
+UNIT_FAMILIES = {2: (1, 1000.0), 4: (3, 1000.0)}
+LEGACY_MIGRATION_BATCH = 100_000  # строк старой recipe_ingredients на один INSERT ... SELECT
+# Ингредиенты рецепта 1 в самом старом формате (колонка text): sort_order, name, amount, unit_id
+LEGACY_RECIPE1_INGREDIENTS = [(1, "Яйца", 2.0, 9), (2, "Хлеб", 1.0, 10), (3, "Соль", None, 7), (4, "Масло", 10.0, 1)]
+
+logger = logging.getLogger("eatwise.migrations")
 
 
 def _ensure_units(cur):
@@ -40,9 +52,9 @@ def _ensure_units(cur):
             cur.execute("INSERT INTO units (id, name) VALUES (?, ?)", (uid, name))
 
 
-def _create_ingredients_table(cur):
-    cur.execute("""
-        CREATE TABLE recipe_ingredients (
+def _create_ingredients_table(cur, table: str = "recipe_ingredients"):
+    cur.execute(f"""
+        CREATE TABLE {table} (
             recipe_id INTEGER NOT NULL,
             sort_order INTEGER NOT NULL,
             name TEXT NOT NULL,
@@ -55,14 +67,6 @@ def _create_ingredients_table(cur):
     """)
 
 
-def _load_recipes_from_json() -> list[dict]:
-    """Загружает рецепты из recipes.json."""
-    if not RECIPES_JSON_PATH.exists():
-        return []
-    with open(RECIPES_JSON_PATH, encoding="utf-8") as f:
-        return json.load(f)
-
-
 def _populate_fallback_recipe(cur):
     """Один рецепт по умолчанию, если recipes.json отсутствует."""
     cur.execute(
@@ -85,36 +89,8 @@ def _populate_fallback_recipe(cur):
 
 def _populate_from_json(cur):
     """Заполняет БД из recipes.json: рецепты, ингредиенты, шаги."""
-    recipes = _load_recipes_from_json()
-    if not recipes:
+    if not RECIPES_JSON_PATH.exists() or not insert_recipes(cur, iter_recipes_json(RECIPES_JSON_PATH)):
         _populate_fallback_recipe(cur)
-        return
-    for r in recipes:
-        cur.execute(
-            """INSERT INTO recipes (name, meal_type, cook_time, needs_pan, needs_oven, needs_blender)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (
-                r["name"],
-                r["meal_type"],
-                r["cook_time"],
-                1 if r.get("needs_pan") else 0,
-                1 if r.get("needs_oven") else 0,
-                1 if r.get("needs_blender") else 0,
-            ),
-        )
-        recipe_id = cur.lastrowid
-        for i, ing in enumerate(r.get("ingredients", []), start=1):
-            unit_name = (ing.get("unit") or "").strip()
-            unit_id = UNIT_NAME_TO_ID.get(unit_name, 7)
-            cur.execute(
-                "INSERT INTO recipe_ingredients (recipe_id, sort_order, name, amount, unit_id) VALUES (?, ?, ?, ?, ?)",
-                (recipe_id, i, ing["name"], ing.get("amount"), unit_id),
-            )
-        for i, step in enumerate(r.get("steps", []), start=1):
-            cur.execute(
-                "INSERT INTO recipe_steps (recipe_id, step_order, step_text) VALUES (?, ?, ?)",
-                (recipe_id, i, step),
-            )
 
 
 def _insert_recipe1_ingredients(cur):
@@ -130,10 +106,81 @@ def _insert_recipe1_ingredients(cur):
     )
 
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+def _ingredient_columns(cur) -> list[str] | None:
+    """Колонки recipe_ingredients или None, если таблицы нет."""
+    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='recipe_ingredients'")
+    if cur.fetchone() is None:
+        return None
+    cur.execute("PRAGMA table_info(recipe_ingredients)")
+    return [row[1] for row in cur.fetchall()]
+
+
+def _legacy_ingredients_select(columns: list[str]) -> str:
+    """SELECT строк новой recipe_ingredients из старой (колонка unit или text); к нему добавляется WHERE.
+
+    Единица ищется в таблице units по названию (как раньше UNIT_NAME_TO_ID),
+    неизвестная — DEFAULT_UNIT_ID. В формате text количества и единицы нет,
+    кроме известных ингредиентов рецепта 1 (LEGACY_RECIPE1_INGREDIENTS).
+    """
+    if "unit" in columns:
+        return f"""SELECT o.recipe_id, o.sort_order, o.name, o.amount,
+                          COALESCE((SELECT MIN(u.id) FROM units u
+                                    WHERE u.name = TRIM(o.unit, ' ' || char(9, 10, 13))), {DEFAULT_UNIT_ID}) AS unit_id
+                   FROM recipe_ingredients o"""
+    recipe1 = ", ".join(
+        f"({order}, '{name}', {'NULL' if amount is None else amount}, {unit_id})"
+        for order, name, amount, unit_id in LEGACY_RECIPE1_INGREDIENTS
+    )
+    return f"""WITH r1 (sort_order, name, amount, unit_id) AS (VALUES {recipe1})
+               SELECT o.recipe_id, o.sort_order,
+                      CASE WHEN r1.sort_order IS NULL THEN o.text ELSE r1.name END,
+                      r1.amount, COALESCE(r1.unit_id, {DEFAULT_UNIT_ID}) AS unit_id
+               FROM recipe_ingredients o
+               LEFT JOIN r1 ON o.recipe_id = 1 AND r1.sort_order = o.sort_order"""
+
+
+def _migrate_legacy_ingredients(cur, columns: list[str], batch_size: int = LEGACY_MIGRATION_BATCH) -> int:
+    """Переводит старую recipe_ingredients (unit или text) на unit_id без чтения строк в Python.
 
+    Новая таблица заполняется INSERT ... SELECT пачками по rowid (прогресс — в лог
+    eatwise.migrations), затем заменяет старую. Выполняется внутри транзакции
+    миграции: при сбое остаётся старая таблица целиком. Возвращает число строк.
+    """
+    select = _legacy_ingredients_select(columns)
+    total = cur.execute("SELECT COUNT(*) FROM recipe_ingredients").fetchone()[0]
+    _create_ingredients_table(cur, "recipe_ingredients_new")
+    copied = 0
+    last = -(2**63)
+    while copied < total:
+        # Граница пачки: rowid batch_size-й строки после last (None — до конца таблицы)
+        row = cur.execute(
+            "SELECT rowid FROM recipe_ingredients WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?",
+            (last, batch_size - 1),
+        ).fetchone()
+        upper = row[0] if row else 2**63 - 1
+        cur.execute(
+            f"""INSERT INTO recipe_ingredients_new (recipe_id, sort_order, name, amount, unit_id)
+                {select}
+                WHERE o.rowid > ? AND o.rowid <= ?""",
+            (last, upper),
+        )
+        copied += cur.rowcount
+        last = upper
+        logger.info("recipe_ingredients: перенесено %d из %d строк", copied, total)
+        if row is None:
+            break
+    cur.execute("DROP TABLE recipe_ingredients")
+    cur.execute("ALTER TABLE recipe_ingredients_new RENAME TO recipe_ingredients")
+    return copied
+
+
+def _migrate_v1(cur, seed: bool = True):
+    """Базовая схема: recipes, units, recipe_ingredients (с unit_id), recipe_steps и данные.
+
+    Повторяет прежнюю логику init_db, поэтому применима и к новой, и к старой БД
+    (user_version = 0), в том числе со старым форматом recipe_ingredients.
+    seed=False — новая БД остаётся пустой (для массового импорта).
+    """
     cur.execute("""
         CREATE TABLE IF NOT EXISTS recipes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -159,15 +206,6 @@ def init_db():
     """)
 
     _ensure_units(cur)
-    # Чеснок: если был в «шт», перевести на «зубчик» (для существующей БД)
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='recipe_ingredients'")
-    if cur.fetchone() is not None:
-        cur.execute("SELECT 1 FROM units WHERE id = 11")
-        if cur.fetchone() is not None:
-            cur.execute(
-                "UPDATE recipe_ingredients SET unit_id = 11 WHERE name = 'Чеснок' AND unit_id = 9"
-            )
-
     cur.execute("SELECT COUNT(*) FROM recipes")
     recipe_count = cur.fetchone()[0]
 
@@ -176,51 +214,26 @@ def init_db():
         cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='recipe_ingredients'")
         if cur.fetchone() is None:
             _create_ingredients_table(cur)
-        _populate_from_json(cur)
-        conn.commit()
-        conn.close()
+        if seed:
+            _populate_from_json(cur)
         return
 
     # Существующая БД — проверяем схему recipe_ingredients
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='recipe_ingredients'")
-    table_exists = cur.fetchone() is not None
-    if table_exists:
-        cur.execute("PRAGMA table_info(recipe_ingredients)")
-        columns = [row[1] for row in cur.fetchall()]
-        if "unit_id" in columns:
-            cur.execute("SELECT COUNT(*) FROM recipe_ingredients WHERE recipe_id = 1")
-            if cur.fetchone()[0] == 0:
-                _insert_recipe1_ingredients(cur)
-        else:
-            migrated = []
-            if "unit" in columns:
-                cur.execute(
-                    "SELECT recipe_id, sort_order, name, amount, unit FROM recipe_ingredients ORDER BY recipe_id, sort_order"
-                )
-                for row in cur.fetchall():
-                    rid, order, name, amount, unit = row
-                    unit_id = UNIT_NAME_TO_ID.get((unit or "").strip(), 7)
-                    migrated.append((rid, order, name, amount, unit_id))
-            else:
-                cur.execute(
-                    "SELECT recipe_id, sort_order, text FROM recipe_ingredients ORDER BY recipe_id, sort_order"
-                )
-                m1 = {1: (1, 1, "Яйца", 2.0, 9), 2: (1, 2, "Хлеб", 1.0, 10), 3: (1, 3, "Соль", None, 7), 4: (1, 4, "Масло", 10.0, 1)}
-                for rid, order, text in cur.fetchall():
-                    if rid == 1:
-                        migrated.append(m1.get(order, (rid, order, text, None, 7)))
-                    else:
-                        migrated.append((rid, order, text, None, 7))
-            cur.execute("DROP TABLE recipe_ingredients")
-            _create_ingredients_table(cur)
-            for row in migrated:
-                cur.execute(
-                    "INSERT INTO recipe_ingredients (recipe_id, sort_order, name, amount, unit_id) VALUES (?, ?, ?, ?, ?)",
-                    row,
-                )
-    else:
+    columns = _ingredient_columns(cur)
+    if columns is None:
         _create_ingredients_table(cur)
         _insert_recipe1_ingredients(cur)
+    elif "unit_id" in columns:
+        cur.execute("SELECT COUNT(*) FROM recipe_ingredients WHERE recipe_id = 1")
+        if cur.fetchone()[0] == 0:
+            _insert_recipe1_ingredients(cur)
+    else:
+        _migrate_legacy_ingredients(cur, columns)
+
+    # Чеснок: если был в «шт», перевести на «зубчик» (после приведения таблицы к unit_id)
+    cur.execute("SELECT 1 FROM units WHERE id = 11")
+    if cur.fetchone() is not None:
+        cur.execute("UPDATE recipe_ingredients SET unit_id = 11 WHERE name = 'Чеснок' AND unit_id = 9")
 
     cur.execute("SELECT COUNT(*) FROM recipe_steps WHERE recipe_id = 1")
     if cur.fetchone()[0] == 0:
@@ -235,10 +248,206 @@ def init_db():
             steps,
         )
 
-    conn.commit()
-    conn.close()
+
+def _migrate_v2(cur):
+    """Индексированная случайная выборка: tool_mask, sample_rank и составные индексы."""
+    cur.execute("ALTER TABLE recipes ADD COLUMN tool_mask INTEGER")
+    cur.execute("ALTER TABLE recipes ADD COLUMN sample_rank INTEGER")
+    rebuild_sample_ranks(cur)
+    create_recipe_indexes(cur)
+
+
+def _migrate_v3(cur):
+    """Таблица meta с версией данных каталога (data_version)."""
+    cur.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    cur.execute("INSERT INTO meta (key, value) VALUES ('data_version', 1)")
+
+
+def _migrate_v4(cur):
+    """content_hash рецептов для инкрементальной синхронизации (sync_catalog.py)."""
+    cur.execute("ALTER TABLE recipes ADD COLUMN content_hash TEXT")
+    update_content_hashes(cur)
+
+
+def _migrate_v5(cur):
+    """Полнотекстовый поиск (FTS5) по названиям, ингредиентам и шагам (search.py)."""
+    cur.execute(
+        """CREATE VIRTUAL TABLE recipes_fts USING fts5(
+               name, ingredients, steps,
+               tokenize = 'unicode61 remove_diacritics 2',
+               prefix = '2 3'
+           )"""
+    )
+    refresh_search_index(cur)
+
+
+def _migrate_v6(cur):
+    """Семейства единиц (г/кг, мл/л) для сводного списка покупок (shopping.py)."""
+    cur.execute("ALTER TABLE units ADD COLUMN base_unit_id INTEGER")
+    cur.execute("ALTER TABLE units ADD COLUMN factor REAL NOT NULL DEFAULT 1")
+    cur.execute("UPDATE units SET base_unit_id = id")
+    cur.executemany(
+        "UPDATE units SET base_unit_id = ?, factor = ? WHERE id = ?",
+        [(base, factor, uid) for uid, (base, factor) in UNIT_FAMILIES.items()],
+    )
+
+
+# Миграции схемы: (версия, функция). Версия записывается в PRAGMA user_version.
+MIGRATIONS = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _read_schema_version(db_path: Path) -> int:
+    """Текущая версия схемы (0, если БД ещё нет). Только чтение, без транзакции записи."""
+    if not db_path.exists():
+        return 0
+    try:
+        conn = connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return 0
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _migration_lock(db_path: Path):
+    """Межпроцессная блокировка на время миграций: несколько серверов не мигрируют одновременно."""
+    with open(db_path.with_name(db_path.name + ".lock"), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def plan_migrations(db_path: Path = DB_PATH) -> dict:
+    """Что сделает init_db, без записи в БД (dry run).
+
+    Возвращает версии схемы, список недостающих миграций и, если нужно переводить
+    старую recipe_ingredients, число её строк и распределение по будущим единицам.
+    """
+    db_path = Path(db_path)
+    version = _read_schema_version(db_path)
+    plan = {
+        "schema_version": version,
+        "target_version": SCHEMA_VERSION,
+        "pending": [target for target, _ in MIGRATIONS if target > version],
+        "legacy_ingredients": None,
+    }
+    if version > 0 or not db_path.exists():
+        return plan
+    conn = connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        cur = conn.cursor()
+        columns = _ingredient_columns(cur)
+        if columns is None or "unit_id" in columns:
+            return plan
+        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='units'")
+        if cur.fetchone() is None:
+            # Таблицу units создаст миграция; для подсчёта — временная копия UNITS
+            cur.execute("CREATE TEMP TABLE units (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+            cur.executemany("INSERT INTO temp.units (id, name) VALUES (?, ?)", UNITS)
+        rows = cur.execute("SELECT COUNT(*) FROM recipe_ingredients").fetchone()[0]
+        by_unit = cur.execute(
+            f"""SELECT COALESCE(u.name, n.unit_id), COUNT(*)
+                FROM ({_legacy_ingredients_select(columns)}) n
+                LEFT JOIN units u ON u.id = n.unit_id
+                GROUP BY n.unit_id
+                ORDER BY COUNT(*) DESC"""
+        ).fetchall()
+        plan["legacy_ingredients"] = {
+            "format": "unit" if "unit" in columns else "text",
+            "rows": rows,
+            "batches": -(-rows // LEGACY_MIGRATION_BATCH),
+            "by_unit": dict(by_unit),
+        }
+        return plan
+    finally:
+        conn.close()
+
+
+def init_db(db_path: Path = DB_PATH, seed: bool = True):
+    """Приводит БД к SCHEMA_VERSION. Если схема актуальна — одно чтение user_version, без записи.
+
+    seed=False — не заполнять новую БД из recipes.json (см. _migrate_v1).
+    """
+    db_path = Path(db_path)
+    if _read_schema_version(db_path) >= SCHEMA_VERSION:
+        return
+    with _migration_lock(db_path):
+        conn = connect(db_path)
+        try:
+            # Другой процесс мог выполнить миграции, пока мы ждали блокировку
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            # WAL: читатели из пула соединений не блокируются записью
+            conn.execute("PRAGMA journal_mode = WAL")
+            cur = conn.cursor()
+            for target, migrate in MIGRATIONS:
+                if target <= version:
+                    continue
+                cur.execute("BEGIN IMMEDIATE")
+                if migrate is _migrate_v1:
+                    migrate(cur, seed=seed)
+                else:
+                    migrate(cur)
+                cur.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Создание и миграция БД рецептов.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="путь к БД (по умолчанию %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="только показать, что будет сделано")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if not args.dry_run:
+        init_db(args.db)
+        print("Database initialized.")
+        return
+    plan = plan_migrations(args.db)
+    if not plan["pending"]:
+        print(f"Схема актуальна (версия {plan['schema_version']}).")
+        return
+    print(
+        f"Схема: версия {plan['schema_version']}, нужна {plan['target_version']}; "
+        f"миграции: {', '.join(map(str, plan['pending']))}."
+    )
+    legacy = plan["legacy_ingredients"]
+    if legacy is not None:
+        print(
+            f"recipe_ingredients (старый формат, колонка {legacy['format']}): "
+            f"{legacy['rows']} строк, пачек {legacy['batches']}."
+        )
+        for unit, count in legacy["by_unit"].items():
+            print(f"  {unit}: {count}")
 
 
 if __name__ == "__main__":
-    init_db()
-    print("Database initialized.")
+    main()
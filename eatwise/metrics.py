@@ -0,0 +1,306 @@
+"""Метрики процесса: задержки SQL-запросов, открытие соединений, фазы перезапуска скрипта.
+
+Соединения из connect() — обёртки над sqlite3 (подклассы Connection и Cursor):
+время запроса считается от execute до последней выбранной строки, вместе с
+числом строк. Медленные запросы (дольше EATWISE_SLOW_QUERY_MS, по умолчанию
+100 мс) пишутся в лог eatwise.sql с планом EXPLAIN QUERY PLAN и хранятся в
+последних SLOW_QUERY_LOG_SIZE записях. Всё отдаётся текстом в формате
+Prometheus (render_prometheus). EATWISE_METRICS=0 отключает обёртки.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+ENABLED = os.environ.get("EATWISE_METRICS", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("EATWISE_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG_SIZE = 50
+MAX_QUERY_LABELS = 200  # остальные запросы попадают в метку "other"
+QUERY_LABEL_LENGTH = 120
+# Границы корзин гистограмм, секунды
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("eatwise.sql")
+_SPACES_RE = re.compile(r"\s+")
+
+
+class Histogram:
+    """Накопительная гистограмма в корзинах BUCKETS (как histogram в Prometheus)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Реестр метрик процесса: гистограммы и счётчики с метками (потокобезопасный)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict = {}  # (имя, метки) -> Histogram
+        self._counters: dict = {}  # (имя, метки) -> число
+        self._help: dict = {}
+        self._query_labels = 0
+        self.slow_queries: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+    def describe(self, name: str, text: str):
+        self._help[name] = text
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Значение, которое ведётся снаружи (например, счётчики кэша)."""
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] = value
+
+    def record_query(self, label: str, elapsed: float, rows: int) -> str:
+        """Время и строки запроса; сверх MAX_QUERY_LABELS разных запросов — метка "other"."""
+        with self._lock:
+            key = ("eatwise_sqlite_query_seconds", (("query", label),))
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                if self._query_labels >= MAX_QUERY_LABELS:
+                    label = "other"
+                    key = ("eatwise_sqlite_query_seconds", (("query", label),))
+                    histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram()
+                    self._query_labels += 1
+            histogram.observe(elapsed)
+            if rows:
+                rows_key = ("eatwise_sqlite_rows_total", (("query", label),))
+                self._counters[rows_key] = self._counters.get(rows_key, 0) + rows
+        return label
+
+    def render_prometheus(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter" if name.endswith("_total") else "gauge")
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip((*BUCKETS, "+Inf"), counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+METRICS = Metrics()
+METRICS.describe("eatwise_sqlite_query_seconds", "Время SQL-запроса от execute до последней строки.")
+METRICS.describe("eatwise_sqlite_rows_total", "Строк выбрано запросом.")
+METRICS.describe("eatwise_sqlite_connect_seconds", "Время открытия соединения SQLite.")
+METRICS.describe("eatwise_sqlite_slow_queries_total", "Запросов дольше порога EATWISE_SLOW_QUERY_MS.")
+METRICS.describe("eatwise_phase_seconds", "Время фаз перезапуска скрипта Streamlit.")
+
+
+_label_cache: dict[str, str] = {}
+
+
+def query_label(sql: str) -> str:
+    """Метка запроса: SQL без лишних пробелов, обрезанный до QUERY_LABEL_LENGTH символов."""
+    label = _label_cache.get(sql)
+    if label is None:
+        label = _SPACES_RE.sub(" ", sql).strip()[:QUERY_LABEL_LENGTH]
+        if len(_label_cache) < MAX_QUERY_LABELS * 4:
+            _label_cache[sql] = label
+    return label
+
+
+def _record_query(conn: sqlite3.Connection, sql: str, parameters, elapsed: float, rows: int):
+    label = METRICS.record_query(query_label(sql), elapsed, rows)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        METRICS.inc("eatwise_sqlite_slow_queries_total")
+        plan = _explain(conn, sql, parameters)
+        METRICS.slow_queries.append(
+            {"query": label, "ms": round(elapsed * 1000, 1), "rows": rows, "plan": plan, "at": time.time()}
+        )
+        logger.warning("медленный запрос %.1f мс, строк %d: %s\n%s", elapsed * 1000, rows, label, "\n".join(plan))
+
+
+def _explain(conn: sqlite3.Connection, sql: str, parameters) -> list[str]:
+    """План запроса (EXPLAIN QUERY PLAN) или пустой список, если его не получить."""
+    if parameters is None:
+        return []
+    try:
+        # Обычный курсор, без обёртки: сам план в метрики не попадает
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error:
+        return []
+    return [row[-1] for row in rows]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Курсор, который замеряет запрос: execute и все вызовы fetch*/next до последней строки.
+
+    Суммируется только время внутри SQLite, без обработки строк вызывающим кодом
+    между ними, поэтому медленная обработка не делает запрос «медленным».
+    """
+
+    _pending = None  # [sql, параметры, секунды, строк]
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, elapsed, rows = pending
+            _record_query(self.connection, sql, parameters, elapsed, rows)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._pending = [sql, parameters, time.perf_counter() - start, 0]
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._pending = [sql, None, time.perf_counter() - start, 0]
+        self._finish()
+        return self
+
+    def _fetched(self, start: float, rows: int, done: bool):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += time.perf_counter() - start
+            pending[3] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Соединение, все запросы которого идут через InstrumentedCursor."""
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or InstrumentedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(database, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect с замером открытия; при включённых метриках — InstrumentedConnection."""
+    if ENABLED:
+        kwargs.setdefault("factory", InstrumentedConnection)
+    mode = "ro" if "mode=ro" in str(database) else "rw"
+    start = time.perf_counter()
+    conn = sqlite3.connect(database, **kwargs)
+    METRICS.observe("eatwise_sqlite_connect_seconds", time.perf_counter() - start, mode=mode)
+    return conn
+
+
+@contextmanager
+def span(phase: str):
+    """Замер фазы перезапуска скрипта (query, formatting, render, rerun)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.observe("eatwise_phase_seconds", time.perf_counter() - start, phase=phase)
+
+
+def timed(phase: str):
+    """Декоратор: весь вызов функции — фаза phase (см. span)."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(phase):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
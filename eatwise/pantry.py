@@ -0,0 +1,161 @@
+"""«Приготовить из того, что есть»: подбор рецептов по продуктам пользователя.
+
+Инвертированный индекс: нормализованное название ингредиента -> компактный
+массив id рецептов. Ингредиенты «по вкусу» и «для жарки» не считаются
+обязательными (как и в format_ingredient). Покрытие рецепта — доля его
+обязательных ингредиентов, которые есть у пользователя. Продукт пользователя
+«лук» покрывает и «Лук», и «Лук репчатый»: ключ ингредиента совпадает с ключом
+продукта или начинается с него (поиск диапазона в отсортированном списке ключей).
+"""
+import re
+import sqlite3
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from db import read_data_version, read_transaction
+from search import fold_text, stem_word
+
+IGNORED_UNITS = ("по вкусу", "для жарки")
+MAX_RESULTS = 10
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def ingredient_key(name: str) -> str:
+    """Нормализованный ключ ингредиента: слова без окончаний через пробел («Яйца» -> «яйц»)."""
+    return " ".join(stem_word(w) for w in _WORD_RE.findall(fold_text(name)))
+
+
+def parse_pantry(text: str) -> list[str]:
+    """Ключи продуктов из ввода пользователя (через запятую или с новой строки)."""
+    keys = {ingredient_key(part) for part in re.split(r"[,;\n]", text)}
+    keys.discard("")
+    return sorted(keys)
+
+
+def covers(pantry_keys: list[str], key: str) -> bool:
+    """Покрывает ли какой-нибудь продукт пользователя ингредиент с ключом key."""
+    return any(key == p or key.startswith(p + " ") for p in pantry_keys)
+
+
+class PantryIndex:
+    """Неизменяемый инвертированный индекс ингредиентов каталога.
+
+    Рецепты пронумерованы позициями в отсортированном массиве id; списки
+    рецептов ключей и число обязательных ингредиентов — массивы numpy по
+    позициям, поэтому совпадения считаются одним bincount, а не словарём.
+    """
+
+    def __init__(self, data_version: int, ids: np.ndarray, required: np.ndarray, postings: dict):
+        self.data_version = data_version
+        self._ids = ids  # позиция -> id рецепта (по возрастанию)
+        self._required = required  # позиция -> число обязательных ингредиентов
+        self._postings = postings  # ключ ингредиента -> позиции рецептов (int32)
+        self._keys = sorted(postings)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "PantryIndex":
+        with read_transaction(conn):
+            data_version = read_data_version(conn)
+            recipe_keys: dict[int, set] = {}
+            key_by_name: dict[str, str] = {}  # названия повторяются: ключ считается один раз
+            for rid, name in conn.execute(
+                f"""SELECT i.recipe_id, i.name
+                    FROM recipe_ingredients i
+                    JOIN units u ON i.unit_id = u.id
+                    WHERE u.name NOT IN ({", ".join("?" * len(IGNORED_UNITS))})""",
+                IGNORED_UNITS,
+            ):
+                key = key_by_name.get(name)
+                if key is None:
+                    key = key_by_name[name] = ingredient_key(name)
+                if key:
+                    recipe_keys.setdefault(rid, set()).add(key)
+        ids = sorted(recipe_keys)
+        postings: dict[str, array] = {}
+        for pos, rid in enumerate(ids):
+            for key in recipe_keys[rid]:
+                if key not in postings:
+                    postings[key] = array("i")
+                postings[key].append(pos)
+        return cls(
+            data_version,
+            np.array(ids, dtype=np.int64),
+            np.fromiter((len(recipe_keys[rid]) for rid in ids), dtype=np.int32, count=len(ids)),
+            {key: np.frombuffer(positions, dtype=np.int32) for key, positions in postings.items()},
+        )
+
+    def to_arrays(self) -> tuple:
+        """Индекс в виде плоских массивов для снимка каталога (snapshot.py).
+
+        (ids, required, keys, starts, positions): ключи по возрастанию, позиции
+        рецептов ключа keys[i] — positions[starts[i]:starts[i + 1]].
+        """
+        keys = self._keys
+        starts = np.zeros(len(keys) + 1, dtype=np.int64)
+        starts[1:] = np.cumsum([len(self._postings[k]) for k in keys])
+        positions = np.concatenate([self._postings[k] for k in keys]) if keys else np.zeros(0, dtype=np.int32)
+        return self._ids, self._required, keys, starts, positions
+
+    @classmethod
+    def from_arrays(cls, data_version: int, ids, required, keys: list[str], starts, positions) -> "PantryIndex":
+        """Индекс поверх массивов to_arrays (буферы из mmap используются без копирования)."""
+        ids = np.frombuffer(ids, dtype=np.int64)
+        required = np.frombuffer(required, dtype=np.int32)
+        positions = np.frombuffer(positions, dtype=np.int32)
+        postings = {key: positions[starts[i] : starts[i + 1]] for i, key in enumerate(keys)}
+        return cls(data_version, ids, required, postings)
+
+    def _matched_keys(self, pantry_keys: list[str]) -> set[str]:
+        keys = self._keys
+        matched = set()
+        for p in pantry_keys:
+            i = bisect_left(keys, p)
+            while i < len(keys) and keys[i].startswith(p):
+                if len(keys[i]) == len(p) or keys[i][len(p)] == " ":
+                    matched.add(keys[i])
+                i += 1
+        return matched
+
+    def match(self, pantry_keys: list[str], allowed: set | None = None, limit: int = MAX_RESULTS) -> list[dict]:
+        """Рецепты по убыванию покрытия: dict с id, coverage, matched, required.
+
+        allowed — множество id, подходящих под фильтры генератора (None — все).
+        При равном покрытии выше рецепты, где не хватает меньше ингредиентов.
+        """
+        matched_keys = self._matched_keys(pantry_keys)
+        if not matched_keys or limit <= 0:
+            return []
+        ids = self._ids
+        counts = np.bincount(np.concatenate([self._postings[k] for k in matched_keys]), minlength=len(ids))
+        if allowed is not None:
+            allowed_ids = np.fromiter(allowed, dtype=np.int64, count=len(allowed))
+            pos = np.searchsorted(ids, allowed_ids)
+            found = pos < len(ids)
+            found[found] = ids[pos[found]] == allowed_ids[found]
+            mask = np.zeros(len(ids), dtype=bool)
+            mask[pos[found]] = True
+            counts[~mask] = 0
+        candidates = np.flatnonzero(counts)
+        if not len(candidates):
+            return []
+        matched = counts[candidates]
+        required = self._required[candidates]
+        coverage = matched / required
+        # Кандидаты не ниже limit-го по покрытию, затем точный порядок (покрытие, -недостающие, id)
+        if len(candidates) > limit:
+            threshold = np.partition(coverage, len(coverage) - limit)[len(coverage) - limit]
+            top = coverage >= threshold
+            candidates, matched, required, coverage = candidates[top], matched[top], required[top], coverage[top]
+        order = np.lexsort((ids[candidates], matched - required, coverage))[::-1][:limit]
+        return [
+            {
+                "id": int(ids[candidates[i]]),
+                "coverage": float(coverage[i]),
+                "matched": int(matched[i]),
+                "required": int(required[i]),
+            }
+            for i in order
+        ]
@@ -0,0 +1,167 @@
+"""План питания на неделю: завтрак, обед и ужин на каждый день.
+
+Весь план собирается из индекса в памяти (catalog_index.FilterIndex) одной
+пакетной выборкой: для каждого типа приёма пищи сразу берётся случайная
+выборка позиций без повторов, затем слоты заполняются жадно с учётом
+ограничений — без повторов рецептов, общего бюджета времени и лимитов на
+духовку и блендер. Бюджет соблюдается так: рецепт слота не длиннее остатка
+бюджета минус минимально возможное время оставшихся слотов.
+Перевыбор одного слота — случайная выборка с отбраковкой, в среднем O(1).
+"""
+import random
+
+from catalog_index import FilterIndex
+from sampling import tool_mask
+
+DAYS = 7
+SLOTS = ("breakfast", "lunch", "dinner")
+OVERSAMPLE = 4  # кандидатов на слот в пакетной выборке
+REROLL_ATTEMPTS = 64
+
+
+class _Candidates:
+    """Рецепты одного типа приёма пищи, подходящие под фильтры, с доступом по позиции."""
+
+    def __init__(self, index: FilterIndex, meal_type: str, max_time: int, user_mask: int):
+        self.segments = index.matching(meal_type, max_time, user_mask)
+        self.total = sum(k for _, k in self.segments)
+        self.min_time = min((index.recipe(ids[0])["cook_time"] for ids, _ in self.segments), default=0)
+
+    def id_at(self, pos: int) -> int:
+        for ids, k in self.segments:
+            if pos < k:
+                return ids[pos]
+            pos -= k
+        raise IndexError(pos)
+
+
+class _Limits:
+    """Счётчики ограничений плана: занятые рецепты, время, духовка, блендер."""
+
+    def __init__(self, time_budget: int | None, max_oven: int | None, max_blender: int | None):
+        self.time_budget = time_budget
+        self.max_oven = max_oven
+        self.max_blender = max_blender
+        self.used: set[int] = set()
+        self.time = 0
+        self.oven = 0
+        self.blender = 0
+
+    def fits(self, recipe: dict, reserve: int) -> bool:
+        """Можно ли добавить рецепт, оставив reserve минут на незаполненные слоты."""
+        if recipe["id"] in self.used:
+            return False
+        if self.time_budget is not None and self.time + recipe["cook_time"] + reserve > self.time_budget:
+            return False
+        if self.max_oven is not None and recipe["needs_oven"] and self.oven >= self.max_oven:
+            return False
+        if self.max_blender is not None and recipe["needs_blender"] and self.blender >= self.max_blender:
+            return False
+        return True
+
+    def add(self, recipe: dict):
+        self.used.add(recipe["id"])
+        self.time += recipe["cook_time"]
+        self.oven += 1 if recipe["needs_oven"] else 0
+        self.blender += 1 if recipe["needs_blender"] else 0
+
+    def remove(self, recipe: dict):
+        self.used.discard(recipe["id"])
+        self.time -= recipe["cook_time"]
+        self.oven -= 1 if recipe["needs_oven"] else 0
+        self.blender -= 1 if recipe["needs_blender"] else 0
+
+
+def _limits_for(index: FilterIndex, plan: list[int | None], time_budget, max_oven, max_blender) -> _Limits:
+    limits = _Limits(time_budget, max_oven, max_blender)
+    for rid in plan:
+        recipe = index.recipe(rid) if rid is not None else None
+        if recipe is not None:
+            limits.add(recipe)
+    return limits
+
+
+def plan_week(
+    index: FilterIndex,
+    max_time: int,
+    has_pan: bool,
+    has_oven: bool,
+    has_blender: bool,
+    time_budget: int | None = None,
+    max_oven: int | None = None,
+    max_blender: int | None = None,
+    days: int = DAYS,
+    rng: random.Random | None = None,
+) -> list[int | None]:
+    """План: список id рецептов длиной days * len(SLOTS) (день за днём, в порядке SLOTS).
+
+    None — для слота не нашлось рецепта, удовлетворяющего ограничениям.
+    """
+    rng = rng or random
+    user_mask = tool_mask(has_pan, has_oven, has_blender)
+    candidates = {meal: _Candidates(index, meal, max_time, user_mask) for meal in SLOTS}
+    # Пакетная выборка: случайные позиции без повторов сразу на все дни
+    pools = {
+        meal: rng.sample(range(c.total), min(c.total, days * OVERSAMPLE)) for meal, c in candidates.items()
+    }
+    slot_meals = [meal for _ in range(days) for meal in SLOTS]
+    reserve = sum(candidates[meal].min_time for meal in slot_meals)
+    limits = _Limits(time_budget, max_oven, max_blender)
+    plan: list[int | None] = []
+    for meal in slot_meals:
+        reserve -= candidates[meal].min_time
+        chosen = None
+        pool = pools[meal]
+        while pool:
+            recipe = index.recipe(candidates[meal].id_at(pool.pop()))
+            if limits.fits(recipe, reserve):
+                chosen = recipe
+                break
+        if chosen is None:
+            # Пакет исчерпан (жёсткие ограничения) — проход только по рецептам, влезающим в бюджет
+            cap = max_time
+            if time_budget is not None:
+                cap = min(cap, time_budget - limits.time - reserve)
+            narrow = _Candidates(index, meal, cap, user_mask)
+            for pos in rng.sample(range(narrow.total), narrow.total):
+                recipe = index.recipe(narrow.id_at(pos))
+                if limits.fits(recipe, reserve):
+                    chosen = recipe
+                    break
+        if chosen is not None:
+            limits.add(chosen)
+            plan.append(chosen["id"])
+        else:
+            plan.append(None)
+    return plan
+
+
+def reroll_slot(
+    index: FilterIndex,
+    plan: list[int | None],
+    slot: int,
+    max_time: int,
+    has_pan: bool,
+    has_oven: bool,
+    has_blender: bool,
+    time_budget: int | None = None,
+    max_oven: int | None = None,
+    max_blender: int | None = None,
+    rng: random.Random | None = None,
+) -> int | None:
+    """Новый рецепт для слота плана (с теми же ограничениями) или прежний, если замены нет."""
+    rng = rng or random
+    limits = _limits_for(index, plan, time_budget, max_oven, max_blender)
+    current = index.recipe(plan[slot]) if plan[slot] is not None else None
+    if current is not None:
+        limits.remove(current)
+    cap = max_time if time_budget is None else min(max_time, time_budget - limits.time)
+    meal = SLOTS[slot % len(SLOTS)]
+    candidates = _Candidates(index, meal, cap, tool_mask(has_pan, has_oven, has_blender))
+    if candidates.total == 0:
+        return plan[slot]
+    for _ in range(REROLL_ATTEMPTS):
+        recipe = index.recipe(candidates.id_at(rng.randrange(candidates.total)))
+        if (current is None or recipe["id"] != current["id"]) and limits.fits(recipe, 0):
+            return recipe["id"]
+    return plan[slot]
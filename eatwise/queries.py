@@ -0,0 +1,49 @@
+"""Гидратация рецептов: рецепт + ингредиенты + шаги за постоянное число запросов."""
+import json
+import sqlite3
+
+from db import RECIPE_COLUMNS, read_transaction
+
+
+def hydrate_recipes(conn: sqlite3.Connection, ids: list[int]) -> list[dict]:
+    """Возвращает рецепты по списку id (в том же порядке, несуществующие пропускаются).
+
+    Каждый рецепт — dict с колонками recipes и ключами "ingredients"
+    (name, amount, unit — как у get_ingredients) и "steps" (список строк).
+    Три запроса в одной транзакции чтения независимо от числа id.
+    """
+    if not ids:
+        return []
+    ids = [int(i) for i in ids]
+    ids_json = json.dumps(ids)
+    with read_transaction(conn):
+        cur = conn.execute(
+            f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE id IN (SELECT value FROM json_each(?))",
+            (ids_json,),
+        )
+        columns = [d[0] for d in cur.description]
+        recipes = {}
+        for row in cur:
+            recipe = dict(zip(columns, row))
+            recipe["ingredients"] = []
+            recipe["steps"] = []
+            recipes[recipe["id"]] = recipe
+        for rid, name, amount, unit in conn.execute(
+            """SELECT i.recipe_id, i.name, i.amount, u.name
+               FROM recipe_ingredients i
+               JOIN units u ON i.unit_id = u.id
+               WHERE i.recipe_id IN (SELECT value FROM json_each(?))
+               ORDER BY i.recipe_id, i.sort_order""",
+            (ids_json,),
+        ):
+            if rid in recipes:
+                recipes[rid]["ingredients"].append({"name": name, "amount": amount, "unit": (unit or "").strip()})
+        for rid, text in conn.execute(
+            """SELECT recipe_id, step_text FROM recipe_steps
+               WHERE recipe_id IN (SELECT value FROM json_each(?))
+               ORDER BY recipe_id, step_order""",
+            (ids_json,),
+        ):
+            if rid in recipes:
+                recipes[rid]["steps"].append(text)
+    return [recipes[i] for i in ids if i in recipes]
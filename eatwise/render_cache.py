@@ -0,0 +1,56 @@
+"""Ограниченный LRU-кэш отрисованных рецептов, общий для всех сессий процесса.
+
+Ключ — (recipe_id, data_version): после обновления каталога ключи меняются,
+и старые записи просто вытесняются как самые давние.
+"""
+import threading
+from collections import OrderedDict
+
+RENDER_CACHE_SIZE = 512
+
+
+class RenderCache:
+    """LRU-кэш со счётчиками попаданий, промахов и вытеснений (потокобезопасный)."""
+
+    def __init__(self, maxsize: int = RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Значение по ключу (и отметка о недавнем использовании) или None."""
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Кладёт значение, вытесняя самые давние записи сверх maxsize. Возвращает value."""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        """Счётчики: hits, misses, evictions, size, maxsize."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+            }
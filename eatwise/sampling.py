@@ -0,0 +1,70 @@
+"""Равномерный случайный выбор рецепта по фильтрам без ORDER BY RANDOM().
+
+Рецепты разбиты на группы (meal_type, tool_mask). Внутри группы sample_rank —
+номер рецепта по возрастанию (cook_time, id), поэтому рецепты группы с
+cook_time <= T — это ровно ранги 1..k. k находится одним спуском по индексу
+idx_recipes_filter, сам рецепт — по индексу idx_recipes_sample. Итого O(log n)
+на выбор при любом размере каталога.
+
+Приложение выбирает рецепты по индексу в памяти (catalog_index.py), а этот
+выбор — запасной путь, пока индекс загружается при старте процесса.
+"""
+import random
+import sqlite3
+
+from db import RECIPE_COLUMNS
+
+PAN, OVEN, BLENDER = 1, 2, 4
+
+
+def tool_mask(has_pan: bool, has_oven: bool, has_blender: bool) -> int:
+    """Битовая маска инструментов (та же, что в колонке recipes.tool_mask)."""
+    return (PAN if has_pan else 0) | (OVEN if has_oven else 0) | (BLENDER if has_blender else 0)
+
+
+def allowed_masks(user_mask: int) -> list[int]:
+    """Маски рецептов, для которых у пользователя есть все нужные инструменты."""
+    return [m for m in range(8) if m & ~user_mask == 0]
+
+
+def count_matching(conn: sqlite3.Connection, meal_type: str, mask: int, max_time: int) -> int:
+    """Число рецептов группы (meal_type, mask) с cook_time <= max_time."""
+    row = conn.execute(
+        """SELECT sample_rank FROM recipes
+           WHERE meal_type = ? AND tool_mask = ? AND cook_time <= ?
+           ORDER BY cook_time DESC, sample_rank DESC
+           LIMIT 1""",
+        (meal_type, mask, max_time),
+    ).fetchone()
+    return row[0] if row and row[0] is not None else 0
+
+
+def pick_random_recipe(
+    conn: sqlite3.Connection,
+    meal_type: str,
+    max_time: int,
+    has_pan: bool,
+    has_oven: bool,
+    has_blender: bool,
+    rng: random.Random | None = None,
+) -> sqlite3.Row | None:
+    """Равномерно выбирает один рецепт среди подходящих под фильтры или None."""
+    rng = rng or random
+    groups = []
+    total = 0
+    for mask in allowed_masks(tool_mask(has_pan, has_oven, has_blender)):
+        k = count_matching(conn, meal_type, mask, max_time)
+        if k:
+            groups.append((mask, k))
+            total += k
+    if total == 0:
+        return None
+    r = rng.randrange(total)
+    for mask, k in groups:
+        if r < k:
+            break
+        r -= k
+    return conn.execute(
+        f"SELECT {RECIPE_COLUMNS} FROM recipes WHERE meal_type = ? AND tool_mask = ? AND sample_rank = ?",
+        (meal_type, mask, r + 1),
+    ).fetchone()
@@ -0,0 +1,61 @@
+"""Полнотекстовый поиск рецептов по названию, ингредиентам и шагам (FTS5).
+
+Индекс recipes_fts заполняют миграция, importer.py и sync_catalog.py.
+Запрос разбивается на слова, у каждого отбрасываются окончания (гласные, й, ь)
+и ищется префикс: «курица» находит «курицы», «курицей»; «яйца» — «яйцо».
+Все слова должны встретиться (AND), результаты ранжируются по bm25 с большим
+весом у названия.
+"""
+import re
+import sqlite3
+
+RESULTS_PER_PAGE = 10
+# Веса колонок recipes_fts для bm25: name, ingredients, steps
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+_WORD_RE = re.compile(r"\w+")
+_ENDING_CHARS = "аеиоуыэюяйь"
+
+
+def fold_text(text: str) -> str:
+    """Нижний регистр и ё -> е, как в индексе."""
+    return text.lower().replace("ё", "е")
+
+
+def stem_word(word: str) -> str:
+    """Отбрасывает до двух конечных гласных/й/ь, оставляя не меньше трёх букв."""
+    for _ in range(2):
+        if len(word) > 3 and word[-1] in _ENDING_CHARS:
+            word = word[:-1]
+    return word
+
+
+def build_match_query(text: str) -> str:
+    """FTS5-выражение для пользовательского запроса ("" — если слов нет)."""
+    words = [stem_word(w) for w in _WORD_RE.findall(fold_text(text))]
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_recipes(
+    conn: sqlite3.Connection, text: str, page: int = 1, per_page: int = RESULTS_PER_PAGE
+) -> tuple[list[dict], int]:
+    """Страница результатов поиска и общее число найденных рецептов.
+
+    Результат — dict с id, name, meal_type, cook_time (по убыванию релевантности).
+    """
+    match = build_match_query(text)
+    if not match:
+        return [], 0
+    total = conn.execute("SELECT COUNT(*) FROM recipes_fts WHERE recipes_fts MATCH ?", (match,)).fetchone()[0]
+    if total == 0:
+        return [], 0
+    rows = conn.execute(
+        f"""SELECT r.id, r.name, r.meal_type, r.cook_time
+            FROM recipes_fts f
+            JOIN recipes r ON r.id = f.rowid
+            WHERE recipes_fts MATCH ?
+            ORDER BY bm25(recipes_fts, {', '.join(map(str, BM25_WEIGHTS))})
+            LIMIT ? OFFSET ?""",
+        (match, per_page, (max(page, 1) - 1) * per_page),
+    ).fetchall()
+    return [{"id": r[0], "name": r[1], "meal_type": r[2], "cook_time": r[3]} for r in rows], total
@@ -0,0 +1,53 @@
+"""Сводный список покупок по нескольким рецептам.
+
+Суммирование делает один запрос с GROUP BY: количества переводятся в базовую
+единицу семейства (кг -> г, л -> мл, см. units.base_unit_id и units.factor),
+умножаются на число порций и складываются по ингредиенту. Одинаковыми
+считаются ингредиенты с равным ключом pantry.ingredient_key («Яйца» и «Яйцо»).
+Позиции «по вкусу» и «для жарки» остаются отдельными строками без количества.
+"""
+import json
+import sqlite3
+
+from pantry import IGNORED_UNITS, ingredient_key
+
+# Базовая единица -> (крупная единица, множитель): 1500 г -> 1,5 кг
+LARGER_UNITS = {"г": ("кг", 1000.0), "мл": ("л", 1000.0)}
+
+
+def build_shopping_list(conn: sqlite3.Connection, servings: dict[int, float]) -> list[dict]:
+    """Список покупок для {id рецепта: множитель порций} в формате get_ingredients.
+
+    Порядок — по первому появлению ингредиента в рецептах (в порядке servings).
+    """
+    if not servings:
+        return []
+    conn.create_function("ingredient_key", 1, ingredient_key, deterministic=True)
+    wanted = json.dumps([[int(rid), float(k)] for rid, k in servings.items()])
+    rows = conn.execute(
+        f"""WITH wanted AS (
+                SELECT CAST(key AS INTEGER) AS pos,
+                       json_extract(value, '$[0]') AS recipe_id,
+                       json_extract(value, '$[1]') AS servings
+                FROM json_each(?)
+            )
+            SELECT MIN(i.name),
+                   SUM(CASE WHEN b.name IN ({", ".join("?" * len(IGNORED_UNITS))})
+                            THEN NULL ELSE i.amount * u.factor * w.servings END),
+                   b.name
+            FROM wanted w
+            JOIN recipe_ingredients i ON i.recipe_id = w.recipe_id
+            JOIN units u ON u.id = i.unit_id
+            JOIN units b ON b.id = COALESCE(u.base_unit_id, u.id)
+            GROUP BY COALESCE(NULLIF(ingredient_key(i.name), ''), i.name), b.id
+            ORDER BY MIN(w.pos * 100000 + i.sort_order)""",
+        (wanted, *IGNORED_UNITS),
+    ).fetchall()
+    items = []
+    for name, amount, unit in rows:
+        unit = (unit or "").strip()
+        if amount is not None and unit in LARGER_UNITS and amount >= LARGER_UNITS[unit][1]:
+            unit, factor = LARGER_UNITS[unit]
+            amount /= factor
+        items.append({"name": name, "amount": amount, "unit": unit})
+    return items
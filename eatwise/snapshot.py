@@ -0,0 +1,386 @@
+"""Компактный read-only снимок каталога в файле, отображаемом в память (mmap).
+
+Несколько процессов Streamlit на одном хосте отображают один и тот же файл:
+страницы снимка общие (page cache), в памяти процесса остаются только
+заголовок и словарь групп фильтров, поэтому расход памяти на процесс не
+растёт с размером каталога.
+
+Раскладка файла — заголовок и секции-массивы (выровнены по 8 байт):
+  - колонки рецептов по возрастанию id: id, name, meal_type, cook_time, флаги
+    инструментов;
+  - группы фильтров (meal_type, tool_mask) как в catalog_index.FilterIndex:
+    id и cook_time, упорядоченные по (cook_time, id), плюс границы групп;
+  - ингредиенты и шаги: диапазоны по рецептам и колонки (имя, количество,
+    id единицы — единицы интернированы в отдельную таблицу);
+  - индекс подбора по продуктам (pantry.PantryIndex): id рецептов, число
+    обязательных ингредиентов, ключи и списки позиций рецептов по ключам;
+  - все строки — в одном блобе UTF-8 с таблицей смещений, одинаковые строки
+    (названия продуктов, единицы) хранятся один раз.
+
+Снимок собирается отдельным шагом после импорта или синхронизации каталога и
+подменяется атомарно (os.replace): открытые отображения старого файла
+остаются валидными, LiveSnapshot подхватывает новый файл при следующей
+проверке.
+
+    python3 eatwise/snapshot.py [--db eatwise/recipes.db] [--out eatwise/recipes.snapshot]
+"""
+import argparse
+import logging
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from catalog_index import RECIPE_KEYS, VERSION_CHECK_INTERVAL, FilterIndex
+from db import DB_PATH, read_data_version, read_transaction
+from init_db import init_db
+from pantry import PantryIndex
+
+logger = logging.getLogger("eatwise.snapshot")
+
+SNAPSHOT_PATH = Path(__file__).parent / "recipes.snapshot"
+MAGIC = b"EWSNAP\x00\x00"
+SNAPSHOT_FORMAT = 2  # увеличить при изменении раскладки
+NO_STRING = -1
+NO_MEAL_TYPE = 255
+
+# Секции в порядке записи: (имя, typecode array)
+SECTIONS = (
+    ("recipe_id", "q"),  # id рецептов по возрастанию
+    ("recipe_name", "i"),  # номер строки
+    ("recipe_meal", "B"),  # номер в meal_types или NO_MEAL_TYPE
+    ("recipe_time", "i"),  # cook_time, -1 — NULL
+    ("recipe_flags", "B"),  # биты PAN/OVEN/BLENDER; те же биты << 4 — NULL
+    ("meal_types", "i"),  # номер строки meal_type
+    ("group_bounds", "i"),  # тройки (meal_type, tool_mask, конец группы в group_ids)
+    ("group_ids", "q"),
+    ("group_times", "i"),
+    ("ing_start", "i"),  # n + 1 границ ингредиентов рецептов (по позиции в recipe_id)
+    ("ing_name", "i"),
+    ("ing_amount", "d"),  # NaN — количество не указано
+    ("ing_unit", "H"),  # id единицы
+    ("unit_name", "i"),  # номер строки по id единицы
+    ("step_start", "i"),  # n + 1 границ шагов рецептов
+    ("step_text", "i"),
+    ("pantry_id", "q"),  # id рецептов индекса по продуктам по возрастанию
+    ("pantry_required", "i"),  # число обязательных ингредиентов (по позиции в pantry_id)
+    ("pantry_key", "i"),  # номер строки ключа ингредиента, ключи по возрастанию
+    ("pantry_start", "q"),  # границы позиций ключей в pantry_pos (ключей + 1)
+    ("pantry_pos", "i"),  # позиции в pantry_id
+    ("str_offset", "q"),  # смещения строк в str_blob (строк + 1)
+    ("str_blob", "B"),
+)
+_HEADER = struct.Struct(f"<8sIcxxxq{len(SECTIONS) * 2}Q")
+_BYTE_ORDER = sys.byteorder[0].encode()  # массивы пишутся в порядке байт машины
+
+
+class _Strings:
+    """Интернирование строк при сборке: одинаковые строки получают один номер."""
+
+    def __init__(self):
+        self._numbers: dict[str, int] = {}
+        self.offsets = array("q", [0])
+        self.blob = bytearray()
+
+    def add(self, text: str | None) -> int:
+        if text is None:
+            return NO_STRING
+        number = self._numbers.get(text)
+        if number is None:
+            number = self._numbers[text] = len(self.offsets) - 1
+            self.blob += text.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return number
+
+
+def _flags(pan, oven, blender) -> int:
+    flags = 0
+    for bit, value in enumerate((pan, oven, blender)):
+        if value is None:
+            flags |= 1 << (bit + 4)
+        elif value:
+            flags |= 1 << bit
+    return flags
+
+
+def _collect(conn: sqlite3.Connection) -> tuple[int, dict]:
+    """Секции снимка из БД (в одной транзакции чтения)."""
+    with read_transaction(conn):
+        data_version = read_data_version(conn)
+        strings = _Strings()
+        s = {name: array(code) for name, code in SECTIONS}
+        meal_codes: dict[str, int] = {}
+        position = {}
+        for rid, name, meal_type, cook_time, pan, oven, blender in conn.execute(
+            "SELECT id, name, meal_type, cook_time, needs_pan, needs_oven, needs_blender FROM recipes ORDER BY id"
+        ):
+            if meal_type is not None and meal_type not in meal_codes:
+                meal_codes[meal_type] = len(meal_codes)
+                s["meal_types"].append(strings.add(meal_type))
+            position[rid] = len(s["recipe_id"])
+            s["recipe_id"].append(rid)
+            s["recipe_name"].append(strings.add(name))
+            s["recipe_meal"].append(NO_MEAL_TYPE if meal_type is None else meal_codes[meal_type])
+            s["recipe_time"].append(-1 if cook_time is None else cook_time)
+            s["recipe_flags"].append(_flags(pan, oven, blender))
+        if len(meal_codes) >= NO_MEAL_TYPE:
+            raise ValueError(f"слишком много типов приёма пищи: {len(meal_codes)}")
+
+        group = None
+        for rid, meal_type, mask, cook_time in conn.execute(
+            """SELECT id, meal_type, tool_mask, cook_time FROM recipes
+               WHERE meal_type IS NOT NULL AND cook_time IS NOT NULL
+               ORDER BY meal_type, tool_mask, cook_time, id"""
+        ):
+            if (meal_type, mask) != group:
+                if group is not None:
+                    s["group_bounds"].extend((meal_codes[group[0]], group[1], len(s["group_ids"])))
+                group = (meal_type, mask)
+            s["group_ids"].append(rid)
+            s["group_times"].append(cook_time)
+        if group is not None:
+            s["group_bounds"].extend((meal_codes[group[0]], group[1], len(s["group_ids"])))
+
+        for uid, name in conn.execute("SELECT id, name FROM units ORDER BY id"):
+            if not 0 <= uid <= 0xFFFF:
+                raise ValueError(f"id единицы вне диапазона снимка: {uid}")
+            s["unit_name"].extend([NO_STRING] * (uid + 1 - len(s["unit_name"])))
+            s["unit_name"][uid] = strings.add((name or "").strip())
+
+        # Рецепты и строки ингредиентов/шагов идут по возрастанию id, поэтому
+        # границы рецептов заполняются одним проходом
+        ing_counts = array("i", bytes(4 * len(position)))
+        for rid, name, amount, uid in conn.execute(
+            """SELECT i.recipe_id, i.name, i.amount, i.unit_id
+               FROM recipe_ingredients i
+               JOIN recipes r ON r.id = i.recipe_id
+               JOIN units u ON u.id = i.unit_id
+               ORDER BY i.recipe_id, i.sort_order"""
+        ):
+            ing_counts[position[rid]] += 1
+            s["ing_name"].append(strings.add(name))
+            s["ing_amount"].append(math.nan if amount is None else amount)
+            s["ing_unit"].append(uid)
+        step_counts = array("i", bytes(4 * len(position)))
+        for rid, text in conn.execute(
+            """SELECT s.recipe_id, s.step_text
+               FROM recipe_steps s JOIN recipes r ON r.id = s.recipe_id
+               ORDER BY s.recipe_id, s.step_order"""
+        ):
+            step_counts[position[rid]] += 1
+            s["step_text"].append(strings.add(text))
+
+        # Та же транзакция: индекс по продуктам той же data_version, что и остальной снимок
+        ids, required, keys, starts, positions = PantryIndex.load(conn).to_arrays()
+        for name, values in (
+            ("pantry_id", ids),
+            ("pantry_required", required),
+            ("pantry_start", starts),
+            ("pantry_pos", positions),
+        ):
+            s[name].frombytes(values.astype(s[name].typecode).tobytes())
+        s["pantry_key"].extend(strings.add(key) for key in keys)
+
+    for counts, starts in ((ing_counts, s["ing_start"]), (step_counts, s["step_start"])):
+        total = 0
+        starts.append(0)
+        for count in counts:
+            total += count
+            starts.append(total)
+    s["str_offset"] = strings.offsets
+    s["str_blob"] = array("B", strings.blob)
+    return data_version, s
+
+
+def build_snapshot(db_path: Path = DB_PATH, out_path: Path = SNAPSHOT_PATH) -> dict:
+    """Собирает снимок каталога и атомарно подменяет им out_path. Возвращает сводку."""
+    init_db(db_path)
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        data_version, sections = _collect(conn)
+    finally:
+        conn.close()
+
+    table = []
+    offset = _HEADER.size
+    for name, _ in SECTIONS:
+        offset += -offset % 8
+        table += [offset, len(sections[name])]
+        offset += len(sections[name]) * sections[name].itemsize
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, SNAPSHOT_FORMAT, _BYTE_ORDER, data_version, *table))
+        for name, _ in SECTIONS:
+            f.write(bytes(-f.tell() % 8))
+            sections[name].tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, out_path)
+    return {
+        "data_version": data_version,
+        "recipes": len(sections["recipe_id"]),
+        "ingredients": len(sections["ing_name"]),
+        "steps": len(sections["step_text"]),
+        "strings": len(sections["str_offset"]) - 1,
+        "bytes": offset,
+    }
+
+
+class CatalogSnapshot(FilterIndex):
+    """Снимок каталога поверх mmap: тот же интерфейс выбора, что у FilterIndex,
+    плюс hydrate (как queries.hydrate_recipes) и pantry (PantryIndex) без обращений к SQLite.
+
+    Все массивы — memoryview над отображением файла, копий в памяти процесса нет.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, fmt, byte_order, data_version, *table = _HEADER.unpack_from(view)
+        if magic != MAGIC or fmt != SNAPSHOT_FORMAT or byte_order != _BYTE_ORDER:
+            raise ValueError(f"{path}: неподдерживаемый формат снимка")
+        for i, (name, code) in enumerate(SECTIONS):
+            offset, count = table[2 * i], table[2 * i + 1]
+            size = array(code).itemsize
+            setattr(self, "_" + name, view[offset : offset + count * size].cast(code))
+        meal_types = [self._string(n) for n in self._meal_types]
+        groups = {}
+        start = 0
+        for i in range(0, len(self._group_bounds), 3):
+            meal, mask, end = self._group_bounds[i : i + 3]
+            groups[(meal_types[meal], mask)] = (self._group_ids[start:end], self._group_times[start:end])
+            start = end
+        super().__init__(data_version, groups, {})
+        self._meal_type_names = meal_types
+        self.pantry = PantryIndex.from_arrays(
+            data_version,
+            self._pantry_id,
+            self._pantry_required,
+            [self._string(n) for n in self._pantry_key],
+            self._pantry_start,
+            self._pantry_pos,
+        )
+        self.path = Path(path)
+
+    def __len__(self) -> int:
+        return len(self._recipe_id)
+
+    def _string(self, number: int) -> str | None:
+        if number == NO_STRING:
+            return None
+        return str(self._str_blob[self._str_offset[number] : self._str_offset[number + 1]], "utf-8")
+
+    def _position(self, recipe_id: int) -> int | None:
+        pos = bisect_left(self._recipe_id, recipe_id)
+        if pos < len(self._recipe_id) and self._recipe_id[pos] == recipe_id:
+            return pos
+        return None
+
+    def _columns(self, pos: int) -> tuple:
+        meal = self._recipe_meal[pos]
+        cook_time = self._recipe_time[pos]
+        flags = self._recipe_flags[pos]
+        tools = [None if flags & (1 << (bit + 4)) else (flags >> bit) & 1 for bit in range(3)]
+        return (
+            self._recipe_id[pos],
+            self._string(self._recipe_name[pos]),
+            None if meal == NO_MEAL_TYPE else self._meal_type_names[meal],
+            None if cook_time < 0 else cook_time,
+            *tools,
+        )
+
+    def recipe(self, recipe_id: int) -> dict | None:
+        pos = self._position(recipe_id)
+        return None if pos is None else dict(zip(RECIPE_KEYS, self._columns(pos)))
+
+    def hydrate(self, ids: list[int]) -> list[dict]:
+        """Рецепты с "ingredients" и "steps" по списку id (как queries.hydrate_recipes)."""
+        recipes = []
+        for rid in ids:
+            pos = self._position(int(rid))
+            if pos is None:
+                continue
+            recipe = dict(zip(RECIPE_KEYS, self._columns(pos)))
+            ingredients = []
+            for i in range(self._ing_start[pos], self._ing_start[pos + 1]):
+                amount = self._ing_amount[i]
+                ingredients.append(
+                    {
+                        "name": self._string(self._ing_name[i]),
+                        "amount": None if math.isnan(amount) else amount,
+                        "unit": self._string(self._unit_name[self._ing_unit[i]]),
+                    }
+                )
+            recipe["ingredients"] = ingredients
+            recipe["steps"] = [
+                self._string(self._step_text[i]) for i in range(self._step_start[pos], self._step_start[pos + 1])
+            ]
+            recipes.append(recipe)
+        return recipes
+
+
+class LiveSnapshot:
+    """Актуальный снимок для всех сессий процесса (интерфейс как у catalog_index.LiveIndex).
+
+    Не чаще раза в check_interval проверяет файл снимка и, если его подменили
+    (другой inode, размер или время изменения), отображает новый. Если файл
+    пропал или не читается, остаётся уже отображённый снимок.
+    """
+
+    def __init__(self, path: Path = SNAPSHOT_PATH, check_interval: float = VERSION_CHECK_INTERVAL):
+        self._path = Path(path)
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._stat = None
+        self._checked_at = 0.0
+
+    def loaded(self) -> CatalogSnapshot:
+        """Как у LiveIndex; снимок открывается быстро, поэтому то же, что current()."""
+        return self.current()
+
+    def current(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self._check_interval:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self._check_interval:
+                return self._snapshot
+            try:
+                st = os.stat(self._path)
+                stat = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+                if self._snapshot is None or stat != self._stat:
+                    # Старое отображение не закрывается: его ещё могут читать другие сессии
+                    self._snapshot = CatalogSnapshot(self._path)
+                    self._stat = stat
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                logger.warning("снимок %s недоступен, используется прежний", self._path, exc_info=True)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка снимка каталога для отображения в память.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="путь к БД (по умолчанию %(default)s)")
+    parser.add_argument("--out", type=Path, default=SNAPSHOT_PATH, help="файл снимка (по умолчанию %(default)s)")
+    args = parser.parse_args()
+    summary = build_snapshot(args.db, args.out)
+    print(
+        f"Снимок {args.out}: рецептов {summary['recipes']}, ингредиентов {summary['ingredients']}, "
+        f"шагов {summary['steps']}, строк {summary['strings']}, {summary['bytes'] / 2**20:.1f} МиБ "
+        f"(data_version {summary['data_version']})."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Инкрементальная синхронизация recipes.json с БД по хэшу содержимого.
+
+Рецепты из JSON сопоставляются с БД по "id" (если указан) или по названию;
+по названию — только с id, которые не указаны явно у других рецептов файла.
+Добавляются новые, обновляются изменившиеся (content_hash не совпал) и
+удаляются отсутствующие в JSON рецепты — одной транзакцией. id существующих
+рецептов сохраняются, поэтому ссылки ?recipe_id= продолжают работать.
+Читатели (WAL) во время синхронизации не блокируются.
+
+    python3 eatwise/sync_catalog.py [recipes.json] [--db eatwise/recipes.db] [--dry-run]
+"""
+import argparse
+import json
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+
+from catalog_store import (
+    bump_data_version,
+    child_rows,
+    insert_child_rows,
+    insert_recipes,
+    iter_recipes_json,
+    rebuild_sample_ranks,
+    recipe_content_hash,
+    recipe_row,
+    refresh_search_index,
+    update_content_hashes,
+)
+from db import DB_PATH
+from init_db import RECIPES_JSON_PATH, init_db
+from sampling import tool_mask
+
+
+def _delete_children(cur, ids: list[int]):
+    ids_json = json.dumps(ids)
+    cur.execute("DELETE FROM recipe_ingredients WHERE recipe_id IN (SELECT value FROM json_each(?))", (ids_json,))
+    cur.execute("DELETE FROM recipe_steps WHERE recipe_id IN (SELECT value FROM json_each(?))", (ids_json,))
+
+
+def sync_catalog(db_path: Path, json_path: Path, dry_run: bool = False) -> dict:
+    """Приводит каталог в БД к json_path. Возвращает сводку: inserted/updated/deleted/unchanged.
+
+    При dry_run изменения вычисляются, но не записываются.
+    """
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        existing = {}
+        by_name = defaultdict(list)
+        for rid, name, content_hash, meal_type, mask in cur.execute(
+            "SELECT id, name, content_hash, meal_type, tool_mask FROM recipes ORDER BY id"
+        ).fetchall():
+            existing[rid] = (content_hash, meal_type, mask)
+            by_name[name].append(rid)
+        for ids in by_name.values():
+            ids.reverse()  # pop() отдаёт самый ранний id
+
+        # Сначала явные id: они закрепляются за своими рецептами раньше, чем рецепты
+        # без id займут те же id по совпадению названия
+        explicit = set()
+        for r in iter_recipes_json(json_path):
+            if r.get("id") is not None:
+                rid = int(r["id"])
+                if rid in explicit:
+                    raise ValueError(f"{json_path}: id {rid} указан у нескольких рецептов")
+                explicit.add(rid)
+
+        seen = set()
+        to_insert, to_update = [], []
+        for r in iter_recipes_json(json_path):
+            rid = r.get("id")
+            if rid is not None:
+                rid = int(rid)
+                if rid not in existing:
+                    to_insert.append(r)
+                    continue
+            else:
+                candidates = by_name.get(r["name"])
+                while candidates and rid is None:
+                    candidate = candidates.pop()
+                    if candidate not in seen and candidate not in explicit:
+                        rid = candidate
+                if rid is None:
+                    to_insert.append(r)
+                    continue
+            seen.add(rid)
+            content_hash = recipe_content_hash(r)
+            if content_hash != existing[rid][0]:
+                to_update.append((rid, r, content_hash))
+        to_delete = [rid for rid in existing if rid not in seen]
+
+        summary = {
+            "inserted": len(to_insert),
+            "updated": len(to_update),
+            "deleted": len(to_delete),
+            "unchanged": len(seen) - len(to_update),
+        }
+        if dry_run or not (to_insert or to_update or to_delete):
+            conn.rollback()
+            return summary
+
+        groups = [existing[rid][1:] for rid in to_delete]
+        groups += [existing[rid][1:] for rid, _, _ in to_update]
+        if to_delete:
+            _delete_children(cur, to_delete)
+            cur.execute("DELETE FROM recipes WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(to_delete),))
+        if to_update:
+            _delete_children(cur, [rid for rid, _, _ in to_update])
+            cur.executemany(
+                """UPDATE recipes
+                   SET name = ?, meal_type = ?, cook_time = ?, needs_pan = ?, needs_oven = ?, needs_blender = ?,
+                       content_hash = ?
+                   WHERE id = ?""",
+                [(*recipe_row(r), content_hash, rid) for rid, r, content_hash in to_update],
+            )
+            for rid, r, _ in to_update:
+                insert_child_rows(cur, *child_rows(rid, r))
+        updated_ids = [rid for rid, _, _ in to_update]
+        changed_ids = to_delete + updated_ids
+        if to_insert:
+            # Новые рецепты с явным id — первыми: id без явного выдаются после них и с ними не совпадут
+            to_insert.sort(key=lambda r: r.get("id") is None)
+            inserted_ids = insert_recipes(cur, to_insert)
+            update_content_hashes(cur, inserted_ids)
+            changed_ids += inserted_ids
+            updated_ids += inserted_ids
+        refresh_search_index(cur, changed_ids)
+        for r in (*to_insert, *(r for _, r, _ in to_update)):
+            groups.append(
+                (r["meal_type"], tool_mask(r.get("needs_pan"), r.get("needs_oven"), r.get("needs_blender")))
+            )
+        rebuild_sample_ranks(cur, groups, updated_ids)
+        bump_data_version(cur)
+        conn.commit()
+        return summary
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Инкрементальная синхронизация каталога рецептов с БД.")
+    parser.add_argument("json_path", type=Path, nargs="?", default=RECIPES_JSON_PATH)
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="путь к БД (по умолчанию %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="только показать изменения")
+    args = parser.parse_args()
+
+    summary = sync_catalog(args.db, args.json_path, dry_run=args.dry_run)
+    prefix = "План" if args.dry_run else "Итог"
+    print(
+        f"{prefix}: добавлено {summary['inserted']}, обновлено {summary['updated']}, "
+        f"удалено {summary['deleted']}, без изменений {summary['unchanged']}."
+    )
+
+
+if __name__ == "__main__":
+    main()
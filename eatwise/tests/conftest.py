@@ -0,0 +1,6 @@
+"""Тесты EatWise. Запуск из папки eatwise: python3 -m pytest tests."""
+import sys
+from pathlib import Path
+
+# Модули приложения импортируются плоско (from db import ...), как при запуске из папки eatwise
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,24 @@
+-- Самый старый формат (user_version = 0): ингредиент — одна строка text
+CREATE TABLE recipes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    meal_type TEXT,
+    cook_time INTEGER,
+    needs_pan INTEGER,
+    needs_oven INTEGER,
+    needs_blender INTEGER
+);
+CREATE TABLE recipe_ingredients (
+    recipe_id INTEGER NOT NULL,
+    sort_order INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, sort_order)
+);
+INSERT INTO recipes VALUES (1, 'Яичница с тостами', 'breakfast', 10, 1, 0, 0);
+INSERT INTO recipes VALUES (2, 'Салат', 'lunch', 15, 0, 0, 0);
+INSERT INTO recipe_ingredients VALUES (1, 1, '2 яйца');
+INSERT INTO recipe_ingredients VALUES (1, 2, '1 кусок хлеба');
+INSERT INTO recipe_ingredients VALUES (1, 3, 'соль по вкусу');
+INSERT INTO recipe_ingredients VALUES (1, 4, '10 г масла');
+INSERT INTO recipe_ingredients VALUES (2, 1, 'Огурцы 2 шт');
+INSERT INTO recipe_ingredients VALUES (2, 2, 'Сметана');
@@ -0,0 +1,35 @@
+-- БД до миграций (user_version = 0): recipe_ingredients с текстовой колонкой unit
+CREATE TABLE recipes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    meal_type TEXT,
+    cook_time INTEGER,
+    needs_pan INTEGER,
+    needs_oven INTEGER,
+    needs_blender INTEGER
+);
+CREATE TABLE recipe_ingredients (
+    recipe_id INTEGER NOT NULL,
+    sort_order INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    amount REAL,
+    unit TEXT,
+    PRIMARY KEY (recipe_id, sort_order)
+);
+CREATE TABLE recipe_steps (
+    recipe_id INTEGER NOT NULL,
+    step_order INTEGER NOT NULL,
+    step_text TEXT NOT NULL,
+    PRIMARY KEY (recipe_id, step_order)
+);
+INSERT INTO recipes VALUES (1, 'Омлет', 'breakfast', 10, 1, 0, 0);
+INSERT INTO recipes VALUES (2, 'Суп', 'lunch', 40, 0, 0, 0);
+INSERT INTO recipe_ingredients VALUES (1, 1, 'Яйца', 2, 'шт');
+INSERT INTO recipe_ingredients VALUES (1, 2, 'Молоко', 100, ' мл ');
+INSERT INTO recipe_ingredients VALUES (1, 3, 'Соль', NULL, 'по вкусу');
+INSERT INTO recipe_ingredients VALUES (2, 1, 'Картофель', 0.5, 'кг' || char(10));
+INSERT INTO recipe_ingredients VALUES (2, 2, 'Чеснок', 2, 'шт');
+INSERT INTO recipe_ingredients VALUES (2, 3, 'Укроп', 1, 'пучок');
+INSERT INTO recipe_ingredients VALUES (2, 4, 'Перец', NULL, NULL);
+INSERT INTO recipe_steps VALUES (1, 1, 'Взбить яйца с молоком');
+INSERT INTO recipe_steps VALUES (2, 1, 'Сварить');
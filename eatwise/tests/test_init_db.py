@@ -0,0 +1,87 @@
+"""Миграция старых форматов recipe_ingredients (колонки unit и text) на unit_id."""
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from init_db import SCHEMA_VERSION, _migrate_legacy_ingredients, init_db
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _legacy_db(tmp_path: Path, fixture: str) -> Path:
+    db_path = tmp_path / "recipes.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((FIXTURES / fixture).read_text(encoding="utf-8"))
+    conn.close()
+    return db_path
+
+
+def _ingredients(db_path: Path) -> list[tuple]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            """SELECT i.recipe_id, i.sort_order, i.name, i.amount, u.name
+               FROM recipe_ingredients i JOIN units u ON u.id = i.unit_id
+               ORDER BY i.recipe_id, i.sort_order"""
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_unit_column_is_converted_to_unit_id(tmp_path):
+    db_path = _legacy_db(tmp_path, "legacy_unit.sql")
+    init_db(db_path)
+    assert _ingredients(db_path) == [
+        (1, 1, "Яйца", 2.0, "шт"),
+        (1, 2, "Молоко", 100.0, "мл"),
+        (1, 3, "Соль", None, "по вкусу"),
+        (2, 1, "Картофель", 0.5, "кг"),
+        (2, 2, "Чеснок", 2.0, "зубчик"),
+        (2, 3, "Укроп", 1.0, "по вкусу"),
+        (2, 4, "Перец", None, "по вкусу"),
+    ]
+
+
+def test_text_column_keeps_text_as_name(tmp_path):
+    db_path = _legacy_db(tmp_path, "legacy_text.sql")
+    init_db(db_path)
+    assert _ingredients(db_path) == [
+        (1, 1, "Яйца", 2.0, "шт"),
+        (1, 2, "Хлеб", 1.0, "кусок"),
+        (1, 3, "Соль", None, "по вкусу"),
+        (1, 4, "Масло", 10.0, "г"),
+        (2, 1, "Огурцы 2 шт", None, "по вкусу"),
+        (2, 2, "Сметана", None, "по вкусу"),
+    ]
+
+
+def test_migrated_db_is_current_and_keeps_recipes(tmp_path):
+    db_path = _legacy_db(tmp_path, "legacy_unit.sql")
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute("SELECT id, name FROM recipes ORDER BY id").fetchall() == [(1, "Омлет"), (2, "Суп")]
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(recipe_ingredients)")]
+        assert "unit_id" in columns and "unit" not in columns
+    finally:
+        conn.close()
+    init_db(db_path)  # повторный запуск ничего не меняет
+    assert len(_ingredients(db_path)) == 7
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 3, 100])
+def test_batches_copy_every_row_once(tmp_path, batch_size):
+    db_path = _legacy_db(tmp_path, "legacy_unit.sql")
+    conn = sqlite3.connect(db_path)
+    try:
+        cur = conn.cursor()
+        cur.execute("CREATE TABLE units (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+        cur.executemany("INSERT INTO units VALUES (?, ?)", [(1, "г"), (2, "кг"), (3, "мл"), (7, "по вкусу"), (9, "шт")])
+        columns = [row[1] for row in cur.execute("PRAGMA table_info(recipe_ingredients)")]
+        assert _migrate_legacy_ingredients(cur, columns, batch_size=batch_size) == 7
+        rows = cur.execute("SELECT recipe_id, sort_order, unit_id FROM recipe_ingredients ORDER BY 1, 2").fetchall()
+    finally:
+        conn.close()
+    assert rows == [(1, 1, 9), (1, 2, 3), (1, 3, 7), (2, 1, 2), (2, 2, 9), (2, 3, 7), (2, 4, 7)]
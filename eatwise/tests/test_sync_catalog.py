@@ -0,0 +1,148 @@
+"""Синхронизация recipes.json с БД: вставка, обновление и удаление с сохранением id."""
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from init_db import init_db
+from sync_catalog import sync_catalog
+
+
+def _recipe(name: str, cook_time: int = 20, **extra) -> dict:
+    return {
+        "name": name,
+        "meal_type": "dinner",
+        "cook_time": cook_time,
+        "needs_pan": True,
+        "needs_oven": False,
+        "needs_blender": False,
+        "ingredients": [
+            {"name": "Соль", "amount": None, "unit": "по вкусу"},
+            {"name": name, "amount": 1, "unit": "шт"},
+        ],
+        "steps": [f"Приготовить: {name}"],
+        **extra,
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path) -> Path:
+    path = tmp_path / "recipes.db"
+    init_db(path, seed=False)
+    return path
+
+
+@pytest.fixture
+def sync(db_path, tmp_path):
+    def run(recipes: list[dict], dry_run: bool = False) -> dict:
+        json_path = tmp_path / "recipes.json"
+        json_path.write_text(json.dumps(recipes, ensure_ascii=False), encoding="utf-8")
+        return sync_catalog(db_path, json_path, dry_run=dry_run)
+
+    return run
+
+
+def _catalog(db_path: Path) -> dict[int, tuple]:
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT id, name, cook_time FROM recipes")
+        return {rid: (name, cook_time) for rid, name, cook_time in rows}
+    finally:
+        conn.close()
+
+
+def _consistent(db_path: Path) -> bool:
+    """Производные данные (FTS, tool_mask, sample_rank, content_hash) соответствуют recipes."""
+    conn = sqlite3.connect(db_path)
+    try:
+        ids = [r[0] for r in conn.execute("SELECT id FROM recipes ORDER BY id")]
+        fts = [r[0] for r in conn.execute("SELECT rowid FROM recipes_fts ORDER BY rowid")]
+        bad_mask = conn.execute(
+            """SELECT COUNT(*) FROM recipes
+               WHERE tool_mask IS NOT ((needs_pan <> 0) | ((needs_oven <> 0) << 1) | ((needs_blender <> 0) << 2))
+                  OR content_hash IS NULL"""
+        ).fetchone()[0]
+        bad_rank = conn.execute(
+            """SELECT COUNT(*) FROM (
+                   SELECT sample_rank,
+                          ROW_NUMBER() OVER (PARTITION BY meal_type, tool_mask ORDER BY cook_time, id) AS rnk
+                   FROM recipes)
+               WHERE sample_rank IS NOT rnk"""
+        ).fetchone()[0]
+        return ids == fts and bad_mask == 0 and bad_rank == 0
+    finally:
+        conn.close()
+
+
+def _data_version(db_path: Path) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_insert_update_delete_keep_ids(sync, db_path):
+    assert sync([_recipe("Плов"), _recipe("Борщ"), _recipe("Рагу")]) == {
+        "inserted": 3,
+        "updated": 0,
+        "deleted": 0,
+        "unchanged": 0,
+    }
+    assert _catalog(db_path) == {1: ("Плов", 20), 2: ("Борщ", 20), 3: ("Рагу", 20)}
+
+    summary = sync([_recipe("Рагу"), _recipe("Плов", cook_time=45), _recipe("Гуляш")])
+    assert summary == {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": 1}
+    # id удалённого рецепта не переиспользуется
+    assert _catalog(db_path) == {1: ("Плов", 45), 3: ("Рагу", 20), 4: ("Гуляш", 20)}
+    assert _consistent(db_path)
+
+
+def test_unchanged_catalog_is_not_written(sync, db_path):
+    recipes = [_recipe("Плов"), _recipe("Борщ")]
+    sync(recipes)
+    version = _data_version(db_path)
+    assert sync(recipes) == {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 2}
+    assert _data_version(db_path) == version
+
+
+def test_dry_run_changes_nothing(sync, db_path):
+    sync([_recipe("Плов")])
+    assert sync([_recipe("Борщ")], dry_run=True) == {"inserted": 1, "updated": 0, "deleted": 1, "unchanged": 0}
+    assert _catalog(db_path) == {1: ("Плов", 20)}
+
+
+def test_explicit_id_renames_recipe(sync, db_path):
+    sync([_recipe("Плов")])
+    assert sync([_recipe("Плов с курицей", id=1)])["updated"] == 1
+    assert _catalog(db_path) == {1: ("Плов с курицей", 20)}
+
+
+def test_explicit_id_wins_over_name_match(sync, db_path):
+    sync([_recipe("Плов")])
+    # Рецепт без id совпадает по названию с id 1, но id 1 явно указан у переименованной копии
+    summary = sync([_recipe("Плов"), _recipe("Плов по-узбекски", id=1)])
+    assert summary == {"inserted": 1, "updated": 1, "deleted": 0, "unchanged": 0}
+    assert _catalog(db_path) == {1: ("Плов по-узбекски", 20), 2: ("Плов", 20)}
+    assert _consistent(db_path)
+
+
+def test_new_explicit_ids_do_not_collide_with_generated(sync, db_path):
+    sync([_recipe("Плов")])
+    sync([_recipe("Плов"), _recipe("Борщ"), _recipe("Рагу", id=2)])
+    assert _catalog(db_path) == {1: ("Плов", 20), 2: ("Рагу", 20), 3: ("Борщ", 20)}
+
+
+def test_duplicate_new_explicit_id_is_rejected(sync, db_path):
+    sync([_recipe("Плов")])
+    with pytest.raises(ValueError, match="id 50"):
+        sync([_recipe("Плов"), _recipe("Борщ", id=50), _recipe("Рагу", id=50)])
+    assert _catalog(db_path) == {1: ("Плов", 20)}
+
+
+def test_duplicate_existing_explicit_id_is_rejected(sync, db_path):
+    sync([_recipe("Плов")])
+    with pytest.raises(ValueError, match="id 1"):
+        sync([_recipe("Плов", id=1), _recipe("Борщ", id=1)])
+    assert _catalog(db_path) == {1: ("Плов", 20)}